@@ -113,16 +113,20 @@ class MarketSimulation:
         # Gets markestart = time.time()t data for simulation
         print("Running simulation...")
         nav_history = []    # store NAV over time
-        for i, market_data in enumerate(self.__price_data_df.itertuples()):
-            if i % (self.__price_data_df.shape[0] // 10) == 0:
-                print(f"Simulation {i / self.__price_data_df.shape[0]:.1%} complete...")
-            for symbol in self.__price_data_df.columns:
-                # Skips symbols that have no data for timestamp
-                if pd.isna(getattr(market_data, symbol)):
+        # Plain (timestamp, *prices) tuples zipped with the column names; no namedtuple
+        # or per-symbol getattr for every row
+        symbols = list(self.__price_data_df.columns)
+        n_rows = self.__price_data_df.shape[0]
+        for i, (timestamp, *prices) in enumerate(self.__price_data_df.itertuples(name=None)):
+            if i % (n_rows // 10) == 0:
+                print(f"Simulation {i / n_rows:.1%} complete...")
+            for symbol, price in zip(symbols, prices):
+                # Skips symbols that have no data for timestamp (NaN != NaN; cheaper than pd.isna)
+                if price != price:
                     continue
 
                 # Creates new MarketDataPoint
-                data_point = MarketDataPoint(market_data.Index, symbol, getattr(market_data, symbol))
+                data_point = MarketDataPoint(timestamp, symbol, price)
 
                 # Generate all raw signals from strategies
                 raw_signals = []
@@ -142,7 +146,7 @@ class MarketSimulation:
                 # Generate final signal and order object
                 size = self.calc_position_size(data_point.timestamp, data_point.symbol, data_point.price, combined_action)
                 final_signal = {"action": combined_action, "symbol": data_point.symbol, "size": size, "price": data_point.price}
-                self.signals[market_data.Index] = self.signals.get(market_data.Index, []) + [final_signal]
+                self.signals[timestamp] = self.signals.get(timestamp, []) + [final_signal]
                 if size == 0:
                     continue
                 if combined_action == "BUY":
@@ -153,8 +157,9 @@ class MarketSimulation:
 
             # Adds NAV for current timestamp to history
             # TODO could calculate NAV in post to increase speed of sim
-            portfolio_value = sum(position['quantity'] * getattr(market_data, symbol) for symbol, position in self.cur_portfolio.items())
-            nav_history.append((market_data.Index, self.cash_balance + portfolio_value))
+            row_prices = dict(zip(symbols, prices))
+            portfolio_value = sum(position['quantity'] * row_prices[symbol] for symbol, position in self.cur_portfolio.items())
+            nav_history.append((timestamp, self.cash_balance + portfolio_value))
             self.portfolio_history.append(self.cur_portfolio)
             self.cash_history.append(self.cash_balance)
 
@@ -178,8 +183,10 @@ class MarketSimulation:
 
     def calc_nav(self):
         nav_history = []
-        for i, market_data in enumerate(self.__price_data_df.itertuples()):
-            portfolio_value = sum(position['quantity'] * getattr(market_data, symbol) for symbol, position in self.portfolio_history[i].items())
-            nav_history.append((market_data.Index, self.cash_history[i] + portfolio_value))
+        symbols = list(self.__price_data_df.columns)
+        for i, (timestamp, *prices) in enumerate(self.__price_data_df.itertuples(name=None)):
+            row_prices = dict(zip(symbols, prices))
+            portfolio_value = sum(position['quantity'] * row_prices[symbol] for symbol, position in self.portfolio_history[i].items())
+            nav_history.append((timestamp, self.cash_history[i] + portfolio_value))
 
         return pd.Series([v for t, v in nav_history],index=[pd.to_datetime(t) for t, v in nav_history])
\ No newline at end of file
@@ -1,18 +1,26 @@
 # order_manager.py
-import json
 import logging
 import socket
 import threading
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from itertools import count
 from typing import Optional, Dict, Any
 
+import orjson
+
 HOST = "127.0.0.1"
 PORT = 62000
 BACKLOG = 10
-RECV_BYTES = 4096
+RECV_BYTES = 65536
 MESSAGE_DELIMITER = b"*"
 
+# Reject ACKs whose payload never changes are encoded once at import time
+_ACK_BAD_JSON = orjson.dumps({"ok": False, "msg": "bad_json"}) + MESSAGE_DELIMITER
+_ACK_RISK_FAIL = orjson.dumps({"ok": False, "msg": "risk_check_failed"}) + MESSAGE_DELIMITER
+_FIXED_ACKS = {"bad_json": _ACK_BAD_JSON, "risk_check_failed": _ACK_RISK_FAIL}
+
+_VALID_SIDES = frozenset(("BUY", "SELL"))
+
 # Logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -21,7 +29,7 @@ logging.basicConfig(
 )
 
 # Order model and validation
-@dataclass
+@dataclass(slots=True)
 class Order:
     side: str          # "BUY" or "SELL"
     symbol: str        # e.g., "AAPL"
@@ -37,18 +45,26 @@ class Order:
             if field not in d:
                 raise ValueError(f"Missing field '{field}' in order payload")
 
-        side = str(d["side"]).upper()
-        if side not in {"BUY", "SELL"}:
-            raise ValueError("side must be BUY or SELL")
-
-        symbol = str(d["symbol"]).upper().strip()
+        # Clients almost always send canonical values; only normalize when needed
+        side = d["side"]
+        if type(side) is not str or side not in _VALID_SIDES:
+            side = str(side).upper()
+            if side not in _VALID_SIDES:
+                raise ValueError("side must be BUY or SELL")
+
+        symbol = d["symbol"]
+        if type(symbol) is not str or not symbol.isupper():
+            symbol = str(symbol).upper()
+        symbol = symbol.strip()  # no copy when there is nothing to trim
         if not symbol:
             raise ValueError("symbol must be non-empty")
 
-        try:
-            qty = int(d["qty"])
-        except Exception:
-            raise ValueError("qty must be an integer")
+        qty = d["qty"]
+        if type(qty) is not int:
+            try:
+                qty = int(qty)
+            except Exception:
+                raise ValueError("qty must be an integer")
         if qty <= 0:
             raise ValueError("qty must be > 0")
 
@@ -64,6 +80,15 @@ class Order:
         return Order(side=side, symbol=symbol, qty=qty, price=price, ts=ts, id=oid)
 
 
+def _is_blank(frame: memoryview) -> bool:
+    """True for empty or whitespace-only frames (checked without copying in the common case)."""
+    if not frame:
+        return True
+    if frame[0] not in b" \t\r\n\x0b\x0c":
+        return False
+    return not frame.tobytes().strip()
+
+
 class OrderManagerServer:
     """
     TCP server that accepts Order messages over a socket.
@@ -76,16 +101,22 @@ class OrderManagerServer:
         self._srv_sock: Optional[socket.socket] = None
         self._stop_event = threading.Event()
         self._threads = []
-        self._order_id_counter = count(1)  # server-side order ids
-        self._order_id_lock = threading.Lock()
+        # server-side order ids; next() on itertools.count is atomic under the
+        # CPython GIL, so client threads can draw ids without a lock
+        self._order_id_counter = count(1)
 
     # Public API
     def start(self):
         self._srv_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._srv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "TCP_FASTOPEN"):  # Linux only
+            try:
+                self._srv_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_FASTOPEN, 5)
+            except OSError:
+                pass
         self._srv_sock.bind((self.host, self.port))
         self._srv_sock.listen(BACKLOG)
-        logging.info(f"OrderManager listening on {self.host}:{self.port}")
+        logging.info("OrderManager listening on %s:%s", self.host, self.port)
 
         try:
             while not self._stop_event.is_set():
@@ -94,6 +125,9 @@ class OrderManagerServer:
                     conn, addr = self._srv_sock.accept()
                 except socket.timeout:
                     continue
+                # ACKs are small standalone writes: disable Nagle so they go out immediately
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
                 t = threading.Thread(
                     target=self._handle_client, args=(conn, addr), daemon=True
                 )
@@ -119,8 +153,11 @@ class OrderManagerServer:
     # Internals
     def _handle_client(self, conn: socket.socket, addr):
         name = f"{addr[0]}:{addr[1]}"
-        logging.info(f"Client connected: {name}")
-        buffer = b""
+        logging.info("Client connected: %s", name)
+        # One bytearray per connection; frames are handed out as memoryview
+        # slices so extracting a frame never copies it.
+        buffer = bytearray()
+        delim_len = len(MESSAGE_DELIMITER)
         try:
             with conn:
                 conn.settimeout(2.0)
@@ -134,26 +171,32 @@ class OrderManagerServer:
                     buffer += chunk
 
                     # Process all complete frames in buffer
-                    while True:
-                        idx = buffer.find(MESSAGE_DELIMITER)
-                        if idx == -1:
-                            break  # no full frame yet
-                        frame = buffer[:idx]
-                        buffer = buffer[idx + len(MESSAGE_DELIMITER):]
-                        if not frame.strip():
-                            continue
-                        self._process_order_frame(frame, conn)
+                    start = 0
+                    with memoryview(buffer) as mv:
+                        while True:
+                            idx = buffer.find(MESSAGE_DELIMITER, start)
+                            if idx == -1:
+                                break  # no full frame yet
+                            with mv[start:idx] as frame:
+                                start = idx + delim_len
+                                if _is_blank(frame):
+                                    continue
+                                self._process_order_frame(frame, conn)
+
+                    # Views are released, so the consumed prefix can be dropped in place
+                    if start:
+                        del buffer[:start]
         except Exception as e:
-            logging.warning(f"Client {name} error: {e}")
+            logging.warning("Client %s error: %s", name, e)
         finally:
-            logging.info(f"Client disconnected: {name}")
+            logging.info("Client disconnected: %s", name)
 
-    def _process_order_frame(self, frame: bytes, conn: socket.socket):
-        # Decode JSON
+    def _process_order_frame(self, frame: memoryview, conn: socket.socket):
+        # Decode JSON (orjson parses the raw bytes, no intermediate str)
         try:
-            payload = json.loads(frame.decode("utf-8"))
-        except json.JSONDecodeError as e:
-            logging.warning(f"Bad JSON payload: {e} | raw={frame!r}")
+            payload = orjson.loads(frame)
+        except orjson.JSONDecodeError as e:
+            logging.warning("Bad JSON payload: %s | raw=%r", e, bytes(frame))
             self._send_ack(conn, ok=False, msg="bad_json")
             return
 
@@ -161,14 +204,13 @@ class OrderManagerServer:
         try:
             order = Order.from_dict(payload)
         except ValueError as e:
-            logging.warning(f"Invalid order: {e} | payload={payload}")
+            logging.warning("Invalid order: %s | payload=%s", e, payload)
             self._send_ack(conn, ok=False, msg=str(e))
             return
 
         # Assign server-side order id if missing
         if order.id is None:
-            with self._order_id_lock:
-                order.id = next(self._order_id_counter)
+            order.id = next(self._order_id_counter)
 
         # "Execute" the order (here we just log it)
         self._log_trade(order)
@@ -177,19 +219,28 @@ class OrderManagerServer:
         self._send_ack(conn, ok=True, order=order)
 
     def _log_trade(self, order: Order):
-        # Human-readable confirmation
+        # Human-readable confirmation; logging only formats if INFO is enabled
         logging.info(
-            f"Received Order {order.id}: {order.side} {order.qty} {order.symbol} @ {order.price:.2f}"
+            "Received Order %s: %s %s %s @ %.2f",
+            order.id, order.side, order.qty, order.symbol, order.price,
         )
 
     def _send_ack(self, conn: socket.socket, ok: bool, order: Optional[Order] = None, msg: str = ""):
+        if not ok and order is None and msg in _FIXED_ACKS:
+            try:
+                conn.sendall(_FIXED_ACKS[msg])
+            except Exception:
+                pass
+            return
+
         ack = {"ok": ok}
         if order is not None:
-            ack["order"] = asdict(order)
+            # orjson serializes the dataclass directly, no asdict() copy
+            ack["order"] = order
         if msg:
             ack["msg"] = msg
         try:
-            conn.sendall(json.dumps(ack).encode("utf-8") + MESSAGE_DELIMITER)
+            conn.sendall(orjson.dumps(ack, option=orjson.OPT_SERIALIZE_DATACLASS) + MESSAGE_DELIMITER)
         except Exception:
             pass
 
@@ -14,9 +14,10 @@ order = Order(msg["55"], int(msg["38"]), msg["54"])
 log.log("OrderCreated", msg)
 
 try:
-    risk.check(order)
+    passed = risk.check(order)
     order.transition(OrderState.ACKED)
-    risk.update_position(order)
+    if passed:
+        risk.update_position(order, checked=True)
     order.transition(OrderState.FILLED)
     log.log("OrderFilled", {"symbol": order.symbol, "qty": order.qty})
 except ValueError as e:
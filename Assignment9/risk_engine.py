@@ -3,22 +3,43 @@ from order import Order
 from logger import Logger
 
 
+class PositionBook(dict):
+    """symbol -> list of accepted orders, with a running qty total per symbol."""
+
+    def __init__(self):
+        super().__init__()
+        self.totals = {}
+
+    def __setitem__(self, symbol, orders):
+        super().__setitem__(symbol, orders)
+        self.totals[symbol] = sum(o.qty for o in orders)
+
+    def add(self, order: Order):
+        orders = self.get(order.symbol)
+        if orders is None:
+            self[order.symbol] = [order]
+        else:
+            orders.append(order)
+            self.totals[order.symbol] += order.qty
+
+
 class RiskEngine:
     def __init__(self, max_order_size=1000, max_position=2000):
         self.max_order_size = max_order_size
         self.max_position = max_position
-        self.positions = {}
+        self.positions = PositionBook()
 
     def check(self, order: Order) -> bool:
         if order.qty > self.max_order_size:
             Logger.log("OrderFailed", f"Order quantity of {order.qty} exceeds max order size {self.max_order_size}")
             return False
-        if order.qty + sum(exist_order.qty for exist_order in self.positions.get(order.symbol, [])) > self.max_position:
+        if order.qty + self.positions.totals.get(order.symbol, 0) > self.max_position:
             Logger.log("OrderFailed", f"Order quantity of {order.qty} would exceed max position size {self.max_position}")
             return False
         return True
 
 
-    def update_position(self, order: Order):
-        if self.check(order):
-            self.positions[order.symbol] = self.positions.get(order.symbol, []) + [order]
\ No newline at end of file
+    def update_position(self, order: Order, checked: bool = False):
+        # checked=True: the caller already ran check() on this order, so skip re-running it
+        if checked or self.check(order):
+            self.positions.add(order)
\ No newline at end of file
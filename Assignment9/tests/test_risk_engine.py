@@ -58,3 +58,16 @@ def test_update_position_skips_failed_orders(monkeypatch):
     assert calls == [
         ("OrderFailed", "Order quantity of 50 exceeds max order size 5")
     ]
+
+
+def test_update_position_skips_recheck_when_already_checked(monkeypatch):
+    calls = spy_logger(monkeypatch)
+    engine = RiskEngine(max_order_size=100)
+    order = Order("TSLA", 50, "1")
+
+    assert engine.check(order)
+    engine.update_position(order, checked=True)
+
+    assert engine.positions["TSLA"] == [order]
+    assert engine.positions.totals["TSLA"] == 50
+    assert calls == []
@@ -3,7 +3,8 @@ from __future__ import annotations
 import argparse
 import csv
 import json
-from dataclasses import dataclass, field, asdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, astuple
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
@@ -11,7 +12,7 @@ from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
 import math
 import numpy as np
 
-from gateway import load_market_data
+from gateway import load_market_batches, load_market_data
 from order import Order
 from order_manager import OrderManager
 from risk_engine import RiskEngineSim
@@ -20,6 +21,7 @@ from strategy import (
     MomentumStrategy,
     StatisticalSignalStrategy,
     SentimentStrategy,
+    MarketDataBatch,
     MarketDataPoint,
     Signal,
 )
@@ -28,6 +30,38 @@ from strategy import (
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_DATA_PATH = BASE_DIR / "data" / "market_data.csv"
 
+# Parsed market data per (loader, file, mtime), one column batch per symbol. Every run
+# and every sweep config reads the same file, so it is only parsed again once the file changes.
+_DATA_CACHE: Dict[tuple, Dict[str, MarketDataBatch]] = {}
+
+
+def _load_by_symbol(loader: Callable[[str], Iterable[MarketDataPoint]], data_source: str) -> Dict[str, MarketDataBatch]:
+    """
+    Market data from data_source as one MarketDataBatch per symbol, memoized on the
+    file's mtime. Batches are never modified, so they are safe to share between runs.
+    Sources that are not files on disk are loaded fresh every time.
+    The key is built from the same file the loader reads.
+    """
+    path = Path(data_source).resolve()
+    try:
+        key = (loader, str(path), path.stat().st_mtime_ns)
+    except OSError:
+        key = None
+    if key is not None and key in _DATA_CACHE:
+        return _DATA_CACHE[key]
+
+    if loader is load_market_data:
+        # The gateway can cut the batches from its cached columns without building points
+        by_symbol = load_market_batches(path)
+    else:
+        points: Dict[str, List[MarketDataPoint]] = {}
+        for mdp in loader(data_source):
+            points.setdefault(mdp.symbol, []).append(mdp)
+        by_symbol = {symbol: MarketDataBatch.from_points(symbol, pts) for symbol, pts in points.items()}
+    if key is not None:
+        _DATA_CACHE[key] = by_symbol
+    return by_symbol
+
 
 @dataclass
 class StrategyConfig:
@@ -40,7 +74,7 @@ class StrategyConfig:
     params: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradeRecord:
     """
     Will be used to keep track of what's happening
@@ -86,7 +120,9 @@ class Backtester:
         self.strategy_params = strategy_params
         self.market_data_path = market_data_path
         self.initial_capital = float(initial_capital)
+        self.risk_limits = risk_limits
 
+        # Each backtester owns its engine, since every run resets it
         self.risk_engine = RiskEngineSim(**(risk_limits or {}))
         self.order_manager = OrderManager(self.risk_engine, simulated=True)
         self._risk_initial_cash = getattr(self.risk_engine, "cash_balance", 0.0)
@@ -94,7 +130,9 @@ class Backtester:
 
         self.trade_log: List[Dict[str, Any]] = []
         self.completed_trades: List[TradeRecord] = []
-        self.equity_curve: List[Dict[str, Any]] = []
+        # equity curve kept as parallel columns rather than a dict per bar
+        self._curve_times: List[datetime] = []
+        self._curve_equity: List[float] = []
         
         
         # initial constraints, and last price
@@ -105,6 +143,12 @@ class Backtester:
         self._open_trade_start: Optional[datetime] = None
         self._last_price: Optional[float] = None
 
+        # win/loss tallies, kept as trades complete so metrics don't rescan completed_trades
+        self._win_count = 0
+        self._win_pnl = 0.0
+        self._loss_count = 0
+        self._loss_pnl = 0.0
+
     def _reset_state(self):
         """
         Re-initializes values for another strategy,
@@ -113,23 +157,33 @@ class Backtester:
         """
         self.trade_log.clear()
         self.completed_trades.clear()
-        self.equity_curve.clear()
+        self._curve_times.clear()
+        self._curve_equity.clear()
         self._cash = self.initial_capital
         self._position = 0
         self._avg_entry_price = 0.0
         self._realized_pnl = 0.0
         self._open_trade_start = None
         self._last_price = None
-        self.risk_engine.positions = {}
-        self.risk_engine.buy_totals = {}
-        self.risk_engine.sell_totals = {}
-        self.risk_engine.cash_balance = self._risk_initial_cash
+        self._win_count = 0
+        self._win_pnl = 0.0
+        self._loss_count = 0
+        self._loss_pnl = 0.0
+        self.risk_engine.reset(cash_balance=self._risk_initial_cash)
+
+    @property
+    def equity_curve(self) -> List[Dict[str, Any]]:
+        """
+        The equity curve as a list of {"timestamp", "equity"} rows.
+        Built on demand from the stored columns; metrics and plots read the columns directly.
+        """
+        return [{"timestamp": ts, "equity": eq} for ts, eq in zip(self._curve_times, self._curve_equity)]
 
     def _mark_to_market(self, timestamp: datetime, price: float):
         """
         
-        Adds a timestamp and current equity to a list
-        of dictionaries, self.equity_curve
+        Adds a timestamp and current equity to the
+        equity curve columns
 
         Args:
             timestamp (datetime): _description_
@@ -139,8 +193,8 @@ class Backtester:
         self._last_price = price
         
         # get cash and right equity to append to equity curve list
-        equity = self._cash + self._position * price
-        self.equity_curve.append({"timestamp": timestamp, "equity": equity})
+        self._curve_times.append(timestamp)
+        self._curve_equity.append(self._cash + self._position * price)
 
     def _record_trade_event(
         self,
@@ -208,6 +262,12 @@ class Backtester:
                 pnl=pnl,
             )
             self.completed_trades.append(trade)
+            if pnl > 0:
+                self._win_count += 1
+                self._win_pnl += pnl
+            elif pnl < 0:
+                self._loss_count += 1
+                self._loss_pnl += pnl
             if self._position == 0:
                 self._avg_entry_price = 0.0
                 self._open_trade_start = None
@@ -235,11 +295,17 @@ class Backtester:
             raise ValueError("strategy params must define a target symbol")
 
         data_source = data_path or self.market_data_path
-        for mdp in self.data_loader(data_source):
-            if mdp.symbol != symbol_filter:
-                continue
-            self._mark_to_market(mdp.timestamp, mdp.price)
-            signal = strategy.on_new_bar(mdp)
+        batch = _load_by_symbol(self.data_loader, data_source).get(symbol_filter)
+        if batch is None:
+            batch = MarketDataBatch([], symbol_filter, np.empty(0, dtype=np.float64))
+        precomputed = self._precompute_signals(strategy, params, batch)
+        # bars are only materialized as MarketDataPoints for strategies fed bar by bar
+        for i, (timestamp, price) in enumerate(zip(batch.timestamps, batch.prices.tolist())):
+            self._mark_to_market(timestamp, price)
+            if precomputed is None:
+                signal = strategy.on_new_bar(MarketDataPoint(timestamp, symbol_filter, price))
+            else:
+                signal = precomputed.get(i)
             if not signal:
                 continue
 
@@ -267,15 +333,31 @@ class Backtester:
         return self.compute_performance_metrics()
 
 
+    @staticmethod
+    def _precompute_signals(strategy: Any, params: Dict[str, Any], batch: MarketDataBatch) -> Optional[Dict[int, Signal]]:
+        """
+        All of a run's signals in one scan, for strategies with a batch generate_signals.
+        Their signals only depend on prices, not on fills, so they can be computed up
+        front and the bar loop just marks to market and routes the bars that fire.
+
+        Returns:
+            Optional[Dict[int, Signal]]: signals keyed by bar index, or None when the strategy has to
+            be fed bar by bar (no batch path, or a float32 ring the float64 batch kernels
+            would not reproduce exactly).
+        """
+        if not hasattr(strategy, "on_bars") or params.get("price_dtype", np.float64) is not np.float64:
+            return None
+        return dict(strategy.on_bars(batch))
+
     """
     Reporting/Metrics functions
     We have Reporting and Metric functions Below!
     """
     def compute_performance_metrics(self) -> Dict[str, Any]:
-        if not self.equity_curve:
+        if not self._curve_equity:
             return {}
-        equity_values = np.array([row["equity"] for row in self.equity_curve], dtype=float)
-        timestamps = [row["timestamp"] for row in self.equity_curve]
+        equity_values = np.array(self._curve_equity, dtype=float)
+        timestamps = self._curve_times
 
         returns = np.diff(equity_values) / np.where(equity_values[:-1] == 0, 1.0, equity_values[:-1])
         avg_return = returns.mean() if returns.size else 0.0
@@ -286,11 +368,11 @@ class Backtester:
         drawdowns = (equity_values - running_max) / np.where(running_max == 0, 1.0, running_max)
         max_drawdown = drawdowns.min() if drawdowns.size else 0.0
 
-        wins = [t.pnl for t in self.completed_trades if t.pnl > 0]
-        losses = [t.pnl for t in self.completed_trades if t.pnl < 0]
-        win_rate = len(wins) / len(self.completed_trades) if self.completed_trades else 0.0
-        profit_factor = (sum(wins) / abs(sum(losses))) if losses else (float("inf") if wins else 0.0)
-        win_loss_ratio = (len(wins) / len(losses)) if losses else (float("inf") if wins else 0.0)
+        wins = self._win_count
+        losses = self._loss_count
+        win_rate = wins / len(self.completed_trades) if self.completed_trades else 0.0
+        profit_factor = (self._win_pnl / abs(self._loss_pnl)) if losses else (float("inf") if wins else 0.0)
+        win_loss_ratio = (wins / losses) if losses else (float("inf") if wins else 0.0)
 
         final_equity = float(equity_values[-1])
         total_return = (final_equity - self.initial_capital) / self.initial_capital
@@ -312,7 +394,7 @@ class Backtester:
         }
 
     def plot_equity_curve(self, output_path: str = "reports/equity_curve.png") -> Path:
-        if not self.equity_curve:
+        if not self._curve_equity:
             raise ValueError("No equity data to plot")
         try:
             import matplotlib.pyplot as plt
@@ -320,11 +402,8 @@ class Backtester:
             raise RuntimeError("matplotlib is required for plotting") from exc
 
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        times = [row["timestamp"] for row in self.equity_curve]
-        equity = [row["equity"] for row in self.equity_curve]
-
         plt.figure(figsize=(10, 4))
-        plt.plot(times, equity, label="Equity")
+        plt.plot(self._curve_times, self._curve_equity, label="Equity")
         plt.title("Equity Curve")
         plt.xlabel("Time")
         plt.ylabel("Equity ($)")
@@ -355,23 +434,33 @@ class Backtester:
         plt.close()
         return Path(output_path)
 
-    def run_parameter_sweep(self, configs: Sequence[StrategyConfig]) -> List[Dict[str, Any]]:
+    def run_parameter_sweep(self, configs: Sequence[StrategyConfig], max_workers: int = 1) -> List[Dict[str, Any]]:
         """
         Execute a series of parameter sets and return their metrics sorted by P&L.
+        With max_workers > 1 the configs run in separate processes, each on its own
+        Backtester built from this one's settings; factories and the data loader must
+        then be picklable (module-level classes/functions).
         """
-        results: List[Dict[str, Any]] = []
-        for cfg in configs:
-            summary = self.run(strategy_factory=cfg.factory, strategy_params=cfg.params)
-            results.append(
-                {
-                    "name": cfg.name,
-                    "params": cfg.params,
-                    "metrics": summary,
-                }
-            )
+        if max_workers > 1 and len(configs) > 1:
+            settings = self._settings()
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(configs))) as ex:
+                results = list(ex.map(_sweep_worker, [settings] * len(configs), configs))
+        else:
+            results = [_sweep_entry(self, cfg) for cfg in configs]
         results.sort(key=lambda item: item["metrics"].get("total_pnl", 0.0), reverse=True)
         return results
 
+    def _settings(self) -> Dict[str, Any]:
+        """Everything needed to rebuild an equivalent Backtester in another process."""
+        return {
+            "strategy_factory": self.strategy_factory,
+            "strategy_params": self.strategy_params,
+            "market_data_path": self.market_data_path,
+            "initial_capital": self.initial_capital,
+            "risk_limits": self.risk_limits,
+            "data_loader": self.data_loader,
+        }
+
     # Convenience presets ------------------------------------------------ #
     @staticmethod
     def default_strategy_configs(symbol: str) -> List[StrategyConfig]:
@@ -414,6 +503,25 @@ class Backtester:
         ]
 
 
+def _sweep_entry(bt: Backtester, cfg: StrategyConfig) -> Dict[str, Any]:
+    """Run one sweep config on bt and package its metrics."""
+    summary = bt.run(strategy_factory=cfg.factory, strategy_params=cfg.params)
+    return {
+        "name": cfg.name,
+        "params": cfg.params,
+        "metrics": summary,
+    }
+
+
+def _sweep_worker(settings: Dict[str, Any], cfg: StrategyConfig) -> Dict[str, Any]:
+    """Process-pool entry point: rebuild the Backtester from settings and run one config."""
+    settings = dict(settings)
+    data_loader = settings.pop("data_loader")
+    bt = Backtester(**settings)
+    bt.data_loader = data_loader
+    return _sweep_entry(bt, cfg)
+
+
 def _sanitize_label(name: str) -> str:
     """
     Convert a strategy label into a filesystem-friendly identifier.
@@ -522,8 +630,7 @@ def _write_trade_log(path: Path, trade_log: List[Dict[str, Any]]) -> Path:
     with open(path, "w", newline="") as fh:
         writer = csv.DictWriter(fh, fieldnames=fieldnames)
         writer.writeheader()
-        for row in trade_log:
-            writer.writerow(row)
+        writer.writerows(trade_log)
     return path
 
 
@@ -540,10 +647,10 @@ def _write_completed_trades(path: Path, trades: List[TradeRecord]) -> Path:
     """
     fieldnames = ["entry_time", "exit_time", "qty", "entry_price", "exit_price", "pnl"]
     with open(path, "w", newline="") as fh:
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
-        writer.writeheader()
-        for trade in trades:
-            writer.writerow(asdict(trade))
+        writer = csv.writer(fh)
+        writer.writerow(fieldnames)
+        # TradeRecord fields are declared in the same order as fieldnames
+        writer.writerows(astuple(trade) for trade in trades)
     return path
 
 
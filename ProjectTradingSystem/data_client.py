@@ -1,5 +1,6 @@
 import asyncio
 import csv
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from queue import Queue
@@ -42,7 +43,7 @@ class LiveMarketDataSource:
         """Convert Alpaca streaming bar to MarketDataPoint."""
         return MarketDataPoint(
             timestamp=bar.timestamp,
-            symbol=bar.symbol,
+            symbol=sys.intern(bar.symbol),  # one shared str per symbol
             price=bar.close
         )
 
@@ -1,16 +1,25 @@
 # gateway.py
+import atexit
 import csv
+import os
+import sys
+import tempfile
+import zipfile
+from logging import INFO
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Generator, Optional
-from queue import Queue
-from threading import Thread
+from typing import Dict, Generator, Optional, Tuple
+from queue import Empty, Queue, SimpleQueue
+from threading import Event, Lock, Thread
 import time
 
+import numpy as np
+
 from alpaca_env_util import load_keys
 from data_client import LiveMarketDataSource
-from order import Order
-from strategy import MarketDataPoint
+from logger import Logger
+from order import Order, _as_dict
+from strategy import MarketDataBatch, MarketDataPoint
 from config.stocks import STOCKS
 from config.crypto import CRYPTO
 
@@ -33,6 +42,79 @@ def _parse_timestamp(ts_str: str) -> Optional[datetime]:
         return None
 
 
+def _sidecar_path(csv_path: Path) -> Path:
+    """Path of the parsed-column cache kept next to a market data csv."""
+    return csv_path.with_name(csv_path.name + ".npz")
+
+
+def _read_sidecar(csv_path: Path) -> Optional[tuple]:
+    """
+    Loads the parsed columns (timestamps, symbols, prices) cached next to csv_path,
+    if that cache exists and is at least as new as the csv.
+    Symbols are stored as category codes, so each distinct symbol is decoded
+    to one shared (interned) str.
+
+    Returns:
+        Optional[tuple]: three lists, or None when the csv has to be parsed again.
+    """
+    cols = _read_sidecar_arrays(csv_path)
+    if cols is None:
+        return None
+    timestamps, names, codes, prices = cols
+    try:
+        symbols = [names[code] for code in codes.tolist()]
+    except IndexError:
+        return None
+    return timestamps.tolist(), symbols, prices.tolist()
+
+
+def _read_sidecar_arrays(csv_path: Path) -> Optional[tuple]:
+    """
+    The sidecar's raw columns: (timestamp strings, interned symbol names,
+    int32 symbol codes, float64 prices), or None when the csv has to be parsed again.
+    """
+    sidecar = _sidecar_path(csv_path)
+    try:
+        if sidecar.stat().st_mtime_ns < csv_path.stat().st_mtime_ns:
+            return None
+        with np.load(sidecar) as cols:
+            names = [sys.intern(name) for name in cols["symbol_names"].tolist()]
+            return cols["timestamp"], names, cols["symbol_code"], cols["price"]
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # a missing, stale-format or corrupt cache is just a miss
+        return None
+
+
+def _write_sidecar(csv_path: Path, timestamps, symbols, prices) -> None:
+    """
+    Saves the parsed columns next to csv_path so the next load skips csv parsing.
+    Written to a uniquely named temp file and renamed, so a half-written cache is
+    never read and concurrent writers (e.g. sweep workers) don't share a temp file.
+    """
+    sidecar = _sidecar_path(csv_path)
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=sidecar.parent, prefix=sidecar.name + ".", suffix=".tmp", delete=False) as f:
+            tmp = Path(f.name)
+            names, codes = np.unique(np.array(symbols), return_inverse=True)
+            np.savez(
+                f,
+                timestamp=np.array(timestamps),
+                symbol_names=names,
+                symbol_code=codes.astype(np.int32),
+                price=np.array(prices, dtype=np.float64),
+            )
+        tmp.replace(sidecar)
+    except OSError:
+        # the cache is optional, e.g. a read-only data directory
+        if tmp is not None:
+            tmp.unlink(missing_ok=True)
+
+
+# Market data file replayed in simulated mode
+_SIMULATED_CSV = Path("data/market_data.csv")
+
+
 _RUN_ID = datetime.now().strftime("%Y%m%d_%H%M%S")
 def _default_audit_path() -> Path:
     """
@@ -49,13 +131,14 @@ def _default_audit_path() -> Path:
     return out_dir / f"order_audit_{_RUN_ID}.csv"
 
 
-def load_market_data(simulated: bool = False) -> Generator[MarketDataPoint, None, None]:
+def load_market_data(simulated: bool = False, csv_path: Optional[str] = None) -> Generator[MarketDataPoint, None, None]:
     """
     Stream rows from market_data.csv as MarketDataPoint instances.
     Expects columns: Datetime, Open, High, Low, Close, Volume, Symbol.
 
     Args:
-        csv_path (str, optional): path to market data csv to be parsed. Defaults to "data/market_data.csv".
+        simulated (bool): replay a csv instead of streaming live data from Alpaca.
+        csv_path (str, optional): path to market data csv to be parsed in simulated mode. Defaults to "data/market_data.csv".
         Assumes a certain structure that will be converted to market data points (date, symbol, price)
 
     Yields:
@@ -63,20 +146,48 @@ def load_market_data(simulated: bool = False) -> Generator[MarketDataPoint, None
         of saving them into a list so processing can happen optimally.
     """
     if simulated:
-        csv_path: str = "data/market_data.csv"
+        csv_path = Path(csv_path) if csv_path is not None else _SIMULATED_CSV
+
+        # Parsed columns are cached next to the csv; reuse them until the csv changes
+        cached = _read_sidecar(csv_path)
+        if cached is not None:
+            parsed: Dict[str, datetime] = {}  # every symbol shares each bar's timestamp
+            for ts_str, symbol, price in zip(*cached):
+                ts = parsed.get(ts_str)
+                if ts is None:
+                    ts = parsed[ts_str] = datetime.fromisoformat(ts_str)
+                yield MarketDataPoint(timestamp=ts, symbol=symbol, price=price)
+            return
+
+        timestamps, symbols, prices = [], [], []
+        with csv_path.open(newline="") as f:
+            # Plain rows indexed by header position instead of a dict per row
+            reader = csv.reader(f)
+            header = next(reader, [])
+            try:
+                ts_col = header.index("Datetime")
+                symbol_col = header.index("Symbol")
+                price_col = header.index("Close")
+            except ValueError:
+                return
+            min_len = max(ts_col, symbol_col, price_col) + 1
+            parsed: Dict[str, Optional[datetime]] = {}  # each bar's timestamp repeats once per symbol
 
-        with open(csv_path, newline="") as f:
-            reader = csv.DictReader(f)
-            
             for row in reader:
-                ts_str = row.get("Datetime")
-                symbol = row.get("Symbol")
-                price_str = row.get("Close")
-                
-                if not ts_str or not symbol or price_str is None:
+                if len(row) < min_len:
                     continue
-                
-                ts = _parse_timestamp(ts_str)
+                ts_str = row[ts_col]
+                # one shared str per symbol, so downstream dict keys compare by identity
+                symbol = sys.intern(row[symbol_col])
+                price_str = row[price_col]
+
+                if not ts_str or not symbol:
+                    continue
+
+                if ts_str in parsed:
+                    ts = parsed[ts_str]
+                else:
+                    ts = parsed[ts_str] = _parse_timestamp(ts_str)
                 if ts is None:
                     continue
                 
@@ -84,9 +195,15 @@ def load_market_data(simulated: bool = False) -> Generator[MarketDataPoint, None
                     price = float(price_str)
                 except ValueError:
                     continue
-                
+
+                timestamps.append(ts.isoformat())
+                symbols.append(symbol)
+                prices.append(price)
                 yield MarketDataPoint(timestamp=ts, symbol=symbol, price=price)
-    
+
+        # only reached once the whole file has been read
+        _write_sidecar(csv_path, timestamps, symbols, prices)
+
     else:
         # --- LIVE MARKET DATA MODE ---
         api_key, api_secret = load_keys()
@@ -140,6 +257,43 @@ def load_market_data(simulated: bool = False) -> Generator[MarketDataPoint, None
             yield mdp
 
 
+def load_market_batches(csv_path=_SIMULATED_CSV) -> Dict[str, MarketDataBatch]:
+    """
+    The simulated market data in csv_path (same rows as load_market_data(simulated=True))
+    as one MarketDataBatch per symbol, in order of first appearance.
+
+    With a fresh sidecar cache the batches are cut straight from its columns:
+    prices stay numpy arrays and no MarketDataPoint is built per bar. Otherwise
+    the csv is streamed through load_market_data, which also refreshes the cache.
+
+    Args:
+        csv_path (str | Path, optional): market data csv. Defaults to "data/market_data.csv".
+
+    Returns:
+        Dict[str, MarketDataBatch]: symbol -> that symbol's bars in file order.
+    """
+    csv_path = Path(csv_path)
+    cols = _read_sidecar_arrays(csv_path)
+    if cols is None:
+        points: Dict[str, list] = {}
+        for mdp in load_market_data(simulated=True, csv_path=csv_path):
+            points.setdefault(mdp.symbol, []).append(mdp)
+        return {symbol: MarketDataBatch.from_points(symbol, pts) for symbol, pts in points.items()}
+
+    ts_strs, names, codes, prices = cols
+    # each bar's timestamp repeats once per symbol, so parse each distinct one once
+    uniq_ts, ts_inverse = np.unique(ts_strs, return_inverse=True)
+    parsed = [datetime.fromisoformat(ts) for ts in uniq_ts.tolist()]
+
+    present, first_seen = np.unique(codes, return_index=True)
+    by_symbol: Dict[str, MarketDataBatch] = {}
+    for code in present[np.argsort(first_seen)].tolist():
+        rows = np.flatnonzero(codes == code)
+        timestamps = [parsed[k] for k in ts_inverse[rows].tolist()]
+        by_symbol[names[code]] = MarketDataBatch(timestamps, names[code], prices[rows])
+    return by_symbol
+
+
 def _order_as_dict(order) -> Dict:
     """
     Coerce an Order or mapping into a flat dictionary for logging.
@@ -157,14 +311,7 @@ def _order_as_dict(order) -> Dict:
     """
     # order instance conversion
     if isinstance(order, Order):
-        return {
-            "id": order.id,
-            "side": order.side,
-            "symbol": order.symbol,
-            "qty": order.qty,
-            "price": order.price,
-            "ts": order.ts,
-        }
+        return _as_dict(order)
     # dictionary instance conversion
     if isinstance(order, dict):
         return {
@@ -179,6 +326,72 @@ def _order_as_dict(order) -> Dict:
     raise TypeError("order must be Order or dict-like")
 
 
+_AUDIT_FIELDNAMES = [
+    "event_time",
+    "event_type",
+    "id",
+    "side",
+    "symbol",
+    "qty",
+    "price",
+    "ts",
+    "status",
+    "filled_qty",
+    "filled_price",
+    "note",
+]
+
+
+def _audit_row(
+    order,
+    event_type: str,
+    status: Optional[str] = None,
+    filled_qty: Optional[int] = None,
+    filled_price: Optional[float] = None,
+    note: Optional[str] = None,
+) -> Tuple:
+    """
+    Snapshot an order event into a flat audit row.
+
+    Returns:
+        Tuple: row values in _AUDIT_FIELDNAMES order, ready for csv.writer
+        (no per-row dict -> list conversion as with DictWriter).
+    """
+    # convert into flat dictionary using _order_as_dict for logging purposes
+    o = _order_as_dict(order)
+    return (
+        datetime.now().isoformat(),
+        event_type,
+        o["id"],
+        o["side"],
+        o["symbol"],
+        o["qty"],
+        o["price"],
+        o["ts"],
+        status,
+        filled_qty,
+        filled_price,
+        note,
+    )
+
+
+def _write_audit_rows(path: Path, rows) -> None:
+    """
+    Append audit rows to a CSV, writing the header for a new file.
+
+    Args:
+        path (Path): audit CSV to append to
+        rows (Iterable[Tuple]): rows built by _audit_row
+    """
+    # boolean to tell us if a path exists
+    exists = path.exists()
+    with path.open("a", newline="") as f:
+        writer = csv.writer(f)
+        if not exists:
+            writer.writerow(_AUDIT_FIELDNAMES)
+        writer.writerows(rows)
+
+
 def log_order_event(
     order,
     event_type: str,
@@ -202,41 +415,196 @@ def log_order_event(
         filled_price (Optional[float], optional): price that was filled/to be logged. Defaults to None.
         note (Optional[str], optional): Any additional things that are seen. Defaults to None.
     """
-    # convert into flat dictionary using _order_as_dict for loggin gpurposes
-    row = _order_as_dict(order)
-    
-    row.update(
-        {
-            "event_time": datetime.now().isoformat(),
-            "event_type": event_type,
-            "status": status,
-            "filled_qty": filled_qty,
-            "filled_price": filled_price,
-            "note": note,
-        }
-    )
+    row = _audit_row(order, event_type, status, filled_qty, filled_price, note)
     # get the filepath if necessary using default_audit path
     path = Path(filepath) if filepath else _default_audit_path()
-    # boolean to tell us if a pth exists
-    exists = path.exists()
-    
-    fieldnames = [
-        "event_time",
-        "event_type",
-        "id",
-        "side",
-        "symbol",
-        "qty",
-        "price",
-        "ts",
-        "status",
-        "filled_qty",
-        "filled_price",
-        "note",
-    ]
-    # write into file 
-    with path.open("a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not exists:
-            writer.writeheader()
-        writer.writerow(row)
\ No newline at end of file
+    _write_audit_rows(path, [row])
+
+
+# Queued by AsyncLogSink.close to stop the drain thread
+_SINK_STOP = object()
+
+
+class AsyncLogSink:
+    """
+    Fire-and-forget logging for the order hot path.
+
+    Callers post order events and Logger entries onto a queue; a single daemon
+    thread drains it in batches, so audit-file I/O no longer sits between a risk
+    check and the order's return. Order fields are snapshotted when posted, so
+    later mutations of the Order are not reflected in the log.
+
+    Audit files stay open between batches (up to MAX_OPEN_FILES, oldest closed
+    first) and are flushed once per batch, so a steady trickle of events costs
+    one buffered write per batch instead of an open/stat/close per row.
+
+    The queue holds at most maxsize entries. When the writer falls that far
+    behind, posting blocks until it catches up (back-pressure) rather than
+    dropping audit rows or letting memory grow without limit. Pass maxsize=0
+    for an unbounded queue.
+    """
+
+    BATCH_SIZE = 256
+    MAX_OPEN_FILES = 8
+    DEFAULT_MAXSIZE = 10_000
+
+    def __init__(self, logger=None, maxsize: int = DEFAULT_MAXSIZE):
+        self._logger = logger
+        self._queue = Queue(maxsize) if maxsize > 0 else SimpleQueue()
+        # path -> (open file, csv writer); only touched by the drain thread
+        self._audit_files: Dict[Path, tuple] = {}
+        self._thread = Thread(target=self._drain, name="AsyncLogSink", daemon=True)
+        self._thread.start()
+
+    def post_order_event(
+        self,
+        order,
+        event_type: str,
+        filepath: Optional[str] = None,
+        status: Optional[str] = None,
+        filled_qty: Optional[int] = None,
+        filled_price: Optional[float] = None,
+        note: Optional[str] = None,
+    ) -> None:
+        """Queue an audit row; same arguments as log_order_event."""
+        row = _audit_row(order, event_type, status, filled_qty, filled_price, note)
+        path = Path(filepath) if filepath else _default_audit_path()
+        self._queue.put((path, row))
+
+    def post_log(self, event_type: str, data: dict) -> None:
+        """Queue a Logger.log call."""
+        self._queue.put((None, (event_type, data)))
+
+    def post_reason(self, event_type: str, reason: str, *args) -> None:
+        """
+        Queue a Logger entry {"reason": reason % args}. Only the raw fields are
+        queued; the message is formatted on the drain thread, and not at all
+        when the logger's INFO level is off.
+        """
+        self._queue.put((event_type, (reason, args)))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything posted before this call has been written."""
+        done = Event()
+        self._queue.put((done, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write everything posted so far, then stop the drain thread and close the audit files."""
+        self._queue.put((_SINK_STOP, None))
+        self._thread.join(timeout)
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"AsyncLogSink write failed: {e}")
+            finally:
+                # Waiters are released even if something in the batch failed
+                for target, _ in batch:
+                    if isinstance(target, Event):
+                        target.set()
+            if any(target is _SINK_STOP for target, _ in batch):
+                for f, _ in self._audit_files.values():
+                    f.close()
+                self._audit_files.clear()
+                return
+
+    def _audit_writer(self, path: Path):
+        """Open (or reuse) the audit file at path, writing the header for a new file."""
+        entry = self._audit_files.get(path)
+        if entry is None:
+            if len(self._audit_files) >= self.MAX_OPEN_FILES:
+                oldest = next(iter(self._audit_files))
+                self._audit_files.pop(oldest)[0].close()
+            exists = path.exists()
+            f = path.open("a", newline="")
+            writer = csv.writer(f)
+            if not exists:
+                writer.writerow(_AUDIT_FIELDNAMES)
+            entry = self._audit_files[path] = (f, writer)
+        return entry[1]
+
+    def _write_audit(self, rows_by_path: Dict[Path, list]):
+        """
+        Append the queued rows to their (kept-open) audit files and flush them.
+        A failing file loses only its own rows and is reopened on its next write.
+        """
+        for path, rows in rows_by_path.items():
+            try:
+                self._audit_writer(path).writerows(rows)
+                self._audit_files[path][0].flush()
+            except Exception as e:
+                entry = self._audit_files.pop(path, None)
+                if entry is not None:
+                    try:
+                        entry[0].close()
+                    except Exception:
+                        pass
+                print(f"AsyncLogSink audit write to {path} failed: {e}")
+        rows_by_path.clear()
+
+    def _write_batch(self, batch):
+        # Consecutive rows for the same file share one write
+        rows_by_path: Dict[Path, list] = {}
+        for target, payload in batch:
+            if isinstance(target, Path):
+                rows_by_path.setdefault(target, []).append(payload)
+                continue
+
+            self._write_audit(rows_by_path)
+
+            if isinstance(target, Event):
+                target.set()  # flush marker
+            elif target is _SINK_STOP:
+                continue
+            elif self._logger is not None:
+                try:
+                    if target is None:
+                        self._logger.log(*payload)
+                    elif self._logger.is_enabled_for(INFO):
+                        reason, args = payload
+                        self._logger.log(target, {"reason": reason % args})
+                except Exception as e:
+                    print(f"AsyncLogSink log entry {target!r} failed: {e}")
+
+        self._write_audit(rows_by_path)
+
+
+_shared_sink: Optional[AsyncLogSink] = None
+_shared_sink_lock = Lock()
+
+
+def shared_log_sink() -> AsyncLogSink:
+    """
+    The process-wide AsyncLogSink: one drain thread feeding the Logger singleton,
+    shared by the order managers and risk engines and closed once at exit.
+    Owners never close it themselves; they flush() it.
+    """
+    global _shared_sink
+    sink = _shared_sink
+    if sink is None:
+        with _shared_sink_lock:
+            if _shared_sink is None:
+                _shared_sink = AsyncLogSink(Logger())
+                atexit.register(_shared_sink.close, 1.0)
+            sink = _shared_sink
+    return sink
+
+
+def _forget_shared_sink():
+    # A forked child (e.g. a sweep worker) inherits the sink but not its drain thread
+    global _shared_sink, _shared_sink_lock
+    _shared_sink = None
+    _shared_sink_lock = Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shared_sink)
@@ -1,38 +1,107 @@
-from collections import deque
-from typing import Optional
+from typing import List, Optional
+
+import numpy as np
+
+from numba_compat import njit
+
+
+@njit(cache=True)
+def _window_max(buf, head, n):
+    """Max of the newest n prices in the ring (head is the next slot to write)."""
+    size = buf.shape[0]
+    best = buf[(head - 1) % size]
+    for i in range(2, n + 1):
+        v = buf[(head - i) % size]
+        if v > best:
+            best = v
+    return best
+
+
+@njit(cache=True)
+def _window_min(buf, head, n):
+    """Min of the newest n prices in the ring (head is the next slot to write)."""
+    size = buf.shape[0]
+    best = buf[(head - 1) % size]
+    for i in range(2, n + 1):
+        v = buf[(head - i) % size]
+        if v < best:
+            best = v
+    return best
+
+
+def _ema_weights(period):
+    """(k, 1 - k) smoothing weights for an EMA over period bars."""
+    k = 2 / (period + 1)
+    return k, 1 - k
+
+
+# Computed once instead of on every price
+_EMA9_W = _ema_weights(9)
+_EMA21_W = _ema_weights(21)
+_EMA50_W = _ema_weights(50)
+_ATR14_W = _ema_weights(14)
+
 
 class IndicatorEngine:
     
     def __init__(self, maxlen=200):
-        self.prices = deque(maxlen=maxlen)
+        # Price history as a float64 ring buffer; _head is the next slot to write
+        self._prices = np.empty(maxlen, dtype=np.float64)
+        self._maxlen = maxlen
+        self._head = 0
+        self.price_count = 0
         self.last_price: Optional[float] = None
 
         #EMA state
         self.ema9 = None
         self.ema21 = None
         self.ema50 = None
+        # EMAs as of the previous price, for crossover checks
+        self.prev_ema9 = None
+        self.prev_ema21 = None
 
         # ATR state
         self.atr14 = None
 
+        # n -> rolling high/low for the current bar; cleared on every new price
+        self._high_cache = {}
+        self._low_cache = {}
+
     def on_price(self, price: float):
+        self._high_cache.clear()
+        self._low_cache.clear()
         self._update_price_buffer(price)
         self._update_emas(price)
         self._update_atr(price)
 
     def _update_price_buffer(self, price: float):
-        self.prices.append(price)
+        self._prices[self._head] = price
+        self._head = (self._head + 1) % self._maxlen
+        if self.price_count < self._maxlen:
+            self.price_count += 1
+
+    @property
+    def prices(self) -> List[float]:
+        """Snapshot of the stored prices, oldest first (copies; prefer price_ago in hot paths)."""
+        n = self.price_count
+        return [float(self._prices[(self._head - n + i) % self._maxlen]) for i in range(n)]
+
+    def price_ago(self, k: int) -> float:
+        """k-th newest stored price (1 = latest)."""
+        return float(self._prices[(self._head - k) % self._maxlen])
 
-    def _update_ema(self, prev_ema, price, period):
-        k = 2 / (period + 1)
+    def _update_ema(self, prev_ema, price, weights):
         if prev_ema is None:
             return price  # initialize EMA starting value
-        return price * k + prev_ema * (1 - k)
+        k, one_minus_k = weights
+        return price * k + prev_ema * one_minus_k
 
     def _update_emas(self, price: float):
-        self.ema9 = self._update_ema(self.ema9, price, 9)
-        self.ema21 = self._update_ema(self.ema21, price, 21)
-        self.ema50 = self._update_ema(self.ema50, price, 50)
+        self.prev_ema9 = self.ema9
+        self.prev_ema21 = self.ema21
+        self.ema9 = self._update_ema(self.ema9, price, _EMA9_W)
+        self.ema21 = self._update_ema(self.ema21, price, _EMA21_W)
+        self.ema50 = self._update_ema(self.ema50, price, _EMA50_W)
 
     def _update_atr(self, price: float):
         if self.last_price is None:
@@ -46,18 +115,26 @@ class IndicatorEngine:
         if self.atr14 is None:
             self.atr14 = tr  # initialize
         else:
-            k = 2 / (14 + 1)
-            self.atr14 = tr * k + self.atr14 * (1 - k)
+            k, one_minus_k = _ATR14_W
+            self.atr14 = tr * k + self.atr14 * one_minus_k
 
     def high_n(self, n):
-        if len(self.prices) < n:
+        cached = self._high_cache.get(n)
+        if cached is not None:
+            return cached
+        if self.price_count < n:
             return None
-        return max(list(self.prices)[-n:])
+        high = self._high_cache[n] = float(_window_max(self._prices, self._head, n))
+        return high
 
     def low_n(self, n):
-        if len(self.prices) < n:
+        cached = self._low_cache.get(n)
+        if cached is not None:
+            return cached
+        if self.price_count < n:
             return None
-        return min(list(self.prices)[-n:])
+        low = self._low_cache[n] = float(_window_min(self._prices, self._head, n))
+        return low
 
 
         
\ No newline at end of file
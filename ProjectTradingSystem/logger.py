@@ -1,5 +1,7 @@
 # logger.py
 import json
+import logging
+import os
 import time
 from pathlib import Path
 from threading import Lock
@@ -31,9 +33,27 @@ class Logger:
         self.filename.touch(exist_ok=True)
         self._initialized = True
         self.entries = []
+        # Uses the stdlib logging level numbers; LOG_LEVEL=WARNING silences routine entries
+        self.set_level(os.environ.get("LOG_LEVEL", "INFO"))
 
 
-    def log(self, event_type: str, data: dict):
+    def set_level(self, level):
+        """Set the minimum level that gets recorded (name like "INFO" or a logging level number)."""
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+            if not isinstance(level, int):
+                level = logging.INFO
+        self.level = level
+
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Check before building an entry so silenced levels skip the formatting work."""
+        return level >= self.level
+
+
+    def log(self, event_type: str, data: dict, level: int = logging.INFO):
+        if level < self.level:
+            return
         print(f"{event_type} -> {data}")
         entry = {
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -4,10 +4,12 @@ trade_logger = setup_logger("Trading", "trading.log")
 regime_logger = setup_logger("Regime", "regime.log")
 signal_logger = setup_logger("Signal", "signal.log")
 
+# Called for every bar of every symbol: pass the values as logging args so the
+# message is only formatted if a handler actually emits the record.
 def log_regime(symbol, timestamp, regime, price, ema9=None, ema21=None, ema50=None):
     regime_logger.info(
-        f"{timestamp} | {symbol} | Regime: {regime} | Price={price:.2f} "
-        f"| EMA9={ema9} EMA21={ema21} EMA50={ema50}"
+        "%s | %s | Regime: %s | Price=%.2f | EMA9=%s EMA21=%s EMA50=%s",
+        timestamp, symbol, regime, price, ema9, ema21, ema50,
     )
 
 def log_signal(symbol, timestamp, signal):
@@ -15,6 +17,6 @@ def log_signal(symbol, timestamp, signal):
         return
     
     signal_logger.info(
-        f"{timestamp} | {symbol} | Signal={signal.signal.value} "
-        f"| Confidence={signal.confidence:.2f} | Reason={signal.reason}"
+        "%s | %s | Signal=%s | Confidence=%.2f | Reason=%s",
+        timestamp, symbol, signal.signal.value, signal.confidence, signal.reason,
     )
@@ -12,18 +12,23 @@ from strategy import (
     MAStrategy,
     MomentumStrategy,
     StatisticalSignalStrategy,
+    PriceRing,
     Signal,
+    ensure_compiled,
     MarketDataPoint,
 )
-from risk_engine import RiskEngineLive
+from risk_engine import get_risk_engine_live
 
 
 def run_stream():
     """Iterate over live market datapoints from Alpaca Socket Webstream, run all strategies per symbol, and route to OrderManager."""
+    # JIT-compile the strategy kernels before the first live bar arrives
+    ensure_compiled()
+
     api_key, api_secret = load_keys()
     trading_client = TradingClient(api_key, api_secret, paper=True)
     
-    risk_engine = RiskEngineLive(max_order_value=10000 , max_asset_percentage=0.10)
+    risk_engine = get_risk_engine_live(max_order_value=10000 , max_asset_percentage=0.10)
     om = OrderManager(trading_client, risk_engine, simulated=False)
 
     ob = OrderBuilder(trading_client)
@@ -32,11 +37,13 @@ def run_stream():
 
     for mdp in load_market_data(simulated=False):
         # Lazily create a set of strategies for each symbol encountered.
+        # They share one price ring, so each bar's price is stored once per symbol.
         if not strategies[mdp.symbol]:
+            history = PriceRing(capacity=22)  # longest window below (21) + 1
             strategies[mdp.symbol] = [
-                MAStrategy(symbol=mdp.symbol, short_window=5, long_window=13),
-                MomentumStrategy(symbol=mdp.symbol, momentum_window=21, momentum_threshold=0.001),
-                StatisticalSignalStrategy(symbol=mdp.symbol, lookback_window=21, zscore_threshold=1.5),
+                MAStrategy(symbol=mdp.symbol, short_window=5, long_window=13, history=history),
+                MomentumStrategy(symbol=mdp.symbol, momentum_window=21, momentum_threshold=0.001, history=history),
+                StatisticalSignalStrategy(symbol=mdp.symbol, lookback_window=21, zscore_threshold=1.5, history=history),
             ]
 
         # Checks the signal for each strategy given the new data
@@ -50,7 +57,7 @@ def run_stream():
         # Ensures all signals match direction
         signals_match = True
         for i in range(len(signals) - 1):
-            if signals[i].signal.value != signals[i+1].signal.value:
+            if signals[i].signal is not signals[i+1].signal:
                 signals_match = False
                 break
         if not signals_match:
@@ -67,6 +74,7 @@ def run_stream():
         order = ob.build_order(agreed_signal)
 
         result = om.process_order(order)
+        ob.invalidate(order.symbol)
         print(f"{mdp.symbol} {agreed_signal.timestamp.isoformat()} {agreed_signal.signal.value} -> {result}")
 
 
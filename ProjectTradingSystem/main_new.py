@@ -9,7 +9,7 @@ from gateway import load_market_data
 from order import OrderBuilder
 from order_manager import OrderManager
 from strategy import MarketDataPoint
-from risk_engine import RiskEngineLive
+from risk_engine import get_risk_engine_live
 from symbol_state import SymbolState
 from config.stocks import STOCKS
 from config.crypto import CRYPTO
@@ -49,7 +49,7 @@ def run_stream():
     api_key, api_secret = load_keys()
     trading_client = TradingClient(api_key, api_secret, paper=True)
     
-    risk_engine = RiskEngineLive(max_order_value=10000 , max_asset_percentage=0.10)
+    risk_engine = get_risk_engine_live(max_order_value=10000 , max_asset_percentage=0.10)
     om = OrderManager(trading_client, risk_engine, simulated=False)
 
     ob = OrderBuilder(trading_client)
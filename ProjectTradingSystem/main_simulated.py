@@ -9,26 +9,29 @@ from strategy import (
     MAStrategy,
     MomentumStrategy,
     StatisticalSignalStrategy,
+    PriceRing,
     Signal,
     MarketDataPoint,
 )
-from risk_engine import RiskEngineSim
+from risk_engine import get_risk_engine_sim
 
 
 def run_simulation_stream():
     """Iterate over market data, run all strategies per symbol, and route to OrderManager."""
-    risk_engine = RiskEngineSim(max_order_size=1000, max_position=2000, cash_balance=10000)
+    risk_engine = get_risk_engine_sim(max_order_size=1000, max_position=2000, cash_balance=10000)
     om = OrderManager(risk_engine, simulated=True)
 
     strategies: Dict[str, List] = defaultdict(list)
 
     for mdp in load_market_data(simulated=True):
         # Lazily create a set of strategies for each symbol encountered.
+        # They share one price ring, so each bar's price is stored once per symbol.
         if not strategies[mdp.symbol]:
+            history = PriceRing(capacity=21)  # longest window below (20) + 1
             strategies[mdp.symbol] = [
-                MAStrategy(symbol=mdp.symbol, short_window=3, long_window=5, position_size=10),
-                MomentumStrategy(symbol=mdp.symbol, momentum_window=10, momentum_threshold=0.001, position_size=10),
-                StatisticalSignalStrategy(symbol=mdp.symbol, lookback_window=20, zscore_threshold=1.5, position_size=10),
+                MAStrategy(symbol=mdp.symbol, short_window=3, long_window=5, position_size=10, history=history),
+                MomentumStrategy(symbol=mdp.symbol, momentum_window=10, momentum_threshold=0.001, position_size=10, history=history),
+                StatisticalSignalStrategy(symbol=mdp.symbol, lookback_window=20, zscore_threshold=1.5, position_size=10, history=history),
             ]
 
         for strat in strategies[mdp.symbol]:
@@ -1,9 +1,34 @@
-import random
+import time
+from threading import local
+from typing import List
+
+import numpy as np
 
 from order import Order
 from orderbook import OrderBook
 
 
+# Synthetic book shape around each simulated order
+_LEVELS = 5
+_TICK_SIZE = 0.01
+_VOL_MEAN = 100
+_VOL_STD = 20
+_OFFSETS = (np.arange(1, _LEVELS + 1) * _TICK_SIZE).tolist()
+
+# One scratch OrderBook per thread, reset between orders so its record and
+# trade pools are reused instead of building a new book for every simulation
+_scratch = local()
+
+
+def _scratch_book() -> OrderBook:
+    ob = getattr(_scratch, "book", None)
+    if ob is None:
+        ob = _scratch.book = OrderBook()
+    else:
+        ob.reset()
+    return ob
+
+
 class MatchingEngine:
 
     @staticmethod
@@ -17,58 +42,59 @@ class MatchingEngine:
         - 60% partial
         - 30% full
         """
-        # 1) Build synthetic orderbook around order price using new OrderBook
-        ob = OrderBook()
+        return MatchingEngine.simulate_batch([order])[0]
+
+    @staticmethod
+    def simulate_batch(orders: List[Order]) -> List[dict]:
+        """
+        simulate_execution for many orders, in order.
+
+        All the randomness (book volumes, outcome draw, partial fill size) is
+        drawn up front in three vectorized calls, instead of per order; each
+        order still gets its own synthetic book to match against.
+        """
+        n = len(orders)
+        if n == 0:
+            return []
+        vols = np.maximum(1, np.random.normal(_VOL_MEAN, _VOL_STD, size=(n, 2 * _LEVELS)).astype(int)).tolist()
+        outcomes = np.random.random(n).tolist()
+        partials = np.random.random(n).tolist()
+
+        results = []
+        for order, order_vols, u, r in zip(orders, vols, outcomes, partials):
+            # Case 1: Cancel
+            if u < 0.1:
+                results.append({"status": "CANCELLED", "qty": 0, "price": None})
+                continue
 
-        levels = 5
-        tick_size = 0.01
+            fill_price = MatchingEngine._book_fill_price(order, order_vols)
+
+            # Case 2: Partial fill, uniform over 1..qty-1
+            if u < 0.7 and order.qty > 1:
+                results.append({"status": "PARTIAL", "qty": 1 + int(r * (order.qty - 1)), "price": fill_price})
+
+            # Case 3: Full fill
+            else:
+                results.append({"status": "FILLED", "qty": order.qty, "price": fill_price})
+        return results
+
+    @staticmethod
+    def _book_fill_price(order: Order, vols: List[int]) -> float:
+        """Match order against a symmetric synthetic book (vols: bids then asks) and return the fill price."""
+        # 1) Build synthetic orderbook around order price on this thread's scratch book
+        ob = _scratch_book()
         base_price = order.price
-        vol_mean = 100
-        vol_std = 20
-
-        # populate symmetric levels
-        for i in range(1, levels + 1):
-            bid_price = base_price - i * tick_size
-            ask_price = base_price + i * tick_size
-            bid_qty = max(1, int(random.gauss(vol_mean, vol_std)))
-            ask_qty = max(1, int(random.gauss(vol_mean, vol_std)))
-            ob.add_order({"order_id": 10_000 + i, "side": "BUY", "symbol": order.symbol, "price": bid_price, "qty": bid_qty})
-            ob.add_order({"order_id": 20_000 + i, "side": "SELL", "symbol": order.symbol, "price": ask_price, "qty": ask_qty})
+        ts = time.time()
+        for i, offset in enumerate(_OFFSETS):
+            ob.add_order({"order_id": 10_001 + i, "side": "BUY", "symbol": order.symbol, "price": base_price - offset, "qty": vols[i], "ts": ts})
+            ob.add_order({"order_id": 20_001 + i, "side": "SELL", "symbol": order.symbol, "price": base_price + offset, "qty": vols[_LEVELS + i], "ts": ts})
 
         # 2) Insert incoming order to determine best executable price via matching
         trades = ob.add_order({"order_id": 1, "side": order.side, "symbol": order.symbol, "price": order.price, "qty": order.qty})
-        fill_price = None
         if trades:
             # use last trade price from simulated matching
             fill_price = trades[-1]["price"]
-        else:
-            # fallback to top of book if no trade generated (should be rare for marketable)
-            fill_price = ob.best_ask() if order.side == "BUY" else ob.best_bid()
-
-        # 3) Apply random execution outcome
-        u = random.random()
-
-        # Case 1: Cancel
-        if u < 0.1:
-            return {
-                "status": "CANCELLED",
-                "qty": 0,
-                "price": None
-            }
-
-        # Case 2: Partial fill
-        elif u < 0.7 and order.qty > 1:
-            filled_qty = random.randint(1, order.qty - 1)
-            return {
-                "status": "PARTIAL",
-                "qty": filled_qty,
-                "price": fill_price
-            }
-
-        # Case 3: Full fill
-        else:
-            return {
-                "status": "FILLED",
-                "qty": order.qty,
-                "price": fill_price
-            }
+            ob.release_trades(trades)
+            return fill_price
+        # fallback to top of book if no trade generated (should be rare for marketable)
+        return ob.best_ask() if order.side == "BUY" else ob.best_bid()
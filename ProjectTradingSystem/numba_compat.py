@@ -0,0 +1,24 @@
+# numba_compat.py
+"""
+Optional Numba support.
+
+numba is not required to run the trading system. When it is installed, `njit`
+is numba's nopython-mode decorator; otherwise it is a no-op and the decorated
+kernels simply run as plain Python.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # Supports both @njit and @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(fn):
+            return fn
+
+        return decorator
@@ -1,15 +1,36 @@
 # order.py
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
+import time
+from typing import Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from enum import IntEnum
 
 from strategy import Signal, SignalType
 
 from alpaca.trading.enums import OrderSide, OrderType, TimeInForce
 from alpaca.trading.requests import LimitOrderRequest, MarketOrderRequest
 
+# Hoisted enum members so to_alpaca_order skips the class attribute lookups
+_SIDE_BUY = OrderSide.BUY
+_SIDE_SELL = OrderSide.SELL
+_TIF_CRYPTO = TimeInForce.GTC
+_TIF_EQUITY = TimeInForce.DAY
+
+# Maps any equal string to the interned module literal, so later side
+# comparisons (order.side == "BUY") hit the identity fast path
+_CANONICAL_SIDES = {"BUY": "BUY", "SELL": "SELL"}
+
+
+class Side(IntEnum):
+    """Signed side: qty * side is the signed position change."""
+    BUY = 1
+    SELL = -1
+
+
+_SIDE_SIGNS = {"BUY": Side.BUY, "SELL": Side.SELL}
+
 
 # Order model and validation
-@dataclass
+@dataclass(slots=True)
 class Order:
     side: str                   # "BUY" or "SELL"
     symbol: str                 # e.g., "AAPL"
@@ -17,6 +38,12 @@ class Order:
     price: float                # positive float
     ts: Optional[float] = None  # client timestamp (epoch seconds), optional
     id: Optional[int] = None    # client-supplied id, optional
+    is_crypto: bool = field(default=False, init=False, repr=False, compare=False)  # crypto pairs look like "BTC/USD"
+    sign: int = field(default=0, init=False, repr=False, compare=False)  # Side.BUY / Side.SELL, 0 if side is invalid
+
+    def __post_init__(self):
+        self.is_crypto = "/" in self.symbol
+        self.sign = _SIDE_SIGNS.get(self.side, 0)
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "Order":
@@ -25,23 +52,31 @@ class Order:
             if field not in d:
                 raise ValueError(f"Missing field '{field}' in order payload")
 
-        # convert side to uppercase for strategies
-        side = str(d["side"]).upper()
-        
-        # ensure an actual workable signal is created
-        if side not in {"BUY", "SELL"}:
-            raise ValueError("side must be BUY or SELL")
+        # canonical "BUY"/"SELL" needs no upper(); either way we keep the interned literal
+        raw_side = d["side"]
+        side = _CANONICAL_SIDES.get(raw_side) if type(raw_side) is str else None
+        if side is None:
+            side = _CANONICAL_SIDES.get(str(raw_side).upper())
+            # ensure an actual workable signal is created
+            if side is None:
+                raise ValueError("side must be BUY or SELL")
 
         # extract only symbol in uppercase, raise error if empty
-        symbol = str(d["symbol"]).upper().strip()
+        # (strip() returns the same object when there is nothing to trim)
+        symbol = d["symbol"]
+        if type(symbol) is not str or not symbol.isupper():
+            symbol = str(symbol).upper()
+        symbol = symbol.strip()
         if not symbol:
             raise ValueError("symbol must be non-empty")
 
         # get quantity value, which must be integer and positive (even if SELL)
-        try:
-            qty = int(d["qty"])
-        except Exception:
-            raise ValueError("qty must be an integer")
+        qty = d["qty"]
+        if type(qty) is not int:
+            try:
+                qty = int(qty)
+            except Exception:
+                raise ValueError("qty must be an integer")
         if qty <= 0:
             raise ValueError("qty must be > 0")
 
@@ -60,18 +95,58 @@ class Order:
         # create the order object
         return Order(side=side, symbol=symbol, qty=qty, price=price, ts=ts, id=oid)
 
+
+def _as_dict(o: Order) -> Dict[str, Any]:
+    """Flat dict of an Order's scalar fields (cheaper than dataclasses.asdict, which recurses and deep-copies)."""
+    return {"id": o.id, "side": o.side, "symbol": o.symbol, "qty": o.qty, "price": o.price, "ts": o.ts}
+
+
 class OrderBuilder():
 
-    def __init__(self, trading_client):
+    def __init__(self, trading_client, cache_ttl: float = 0.25):
         
         self.trading_client = trading_client
+
+        # Short-lived caches so bursts of signals don't each pay an API round trip
+        self._ttl = cache_ttl
+        self._pos_cache: Dict[str, Tuple[float, float]] = {}     # symbol -> (qty, fetched_at)
+        self._account_cache: Optional[Tuple[float, float]] = None  # (cash, fetched_at)
+
+    def _position_qty(self, symbol: str) -> float:
+        now = time.monotonic()
+        cached = self._pos_cache.get(symbol)
+        if cached is not None and now - cached[1] < self._ttl:
+            return cached[0]
+
+        position = self.trading_client.get_open_position(symbol.replace("/", ""))
+        qty = abs(float(position.qty))
+        self._pos_cache[symbol] = (qty, now)
+        return qty
+
+    def _cash(self) -> float:
+        now = time.monotonic()
+        cached = self._account_cache
+        if cached is not None and now - cached[1] < self._ttl:
+            return cached[0]
+
+        account = self.trading_client.get_account()
+        cash = float(account.non_marginable_buying_power)
+        self._account_cache = (cash, now)
+        return cash
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop cached account/position values after an order is submitted."""
+        self._account_cache = None
+        if symbol is None:
+            self._pos_cache.clear()
+        else:
+            self._pos_cache.pop(symbol, None)
     
     def get_order_size(self, signal: Signal):
         
-        if signal.signal == SignalType.SELL:
+        if signal.signal is SignalType.SELL:
             try:
-                position = self.trading_client.get_open_position(signal.symbol.replace("/", ""))
-                qty = abs(float(position.qty))
+                qty = self._position_qty(signal.symbol)
 
                 if qty == 0:
                     print("No position to close.")
@@ -83,9 +158,8 @@ class OrderBuilder():
                 print("No open position found.")
                 return 0
         
-        if signal.signal == SignalType.BUY:
-            account = self.trading_client.get_account()
-            cash = float(account.non_marginable_buying_power)
+        if signal.signal is SignalType.BUY:
+            cash = self._cash()
 
             allocation = cash * 0.01   # 1% of total cash
 
@@ -113,26 +187,18 @@ class OrderBuilder():
 
 
 def to_alpaca_order(order):
-    side = OrderSide.BUY if order.side.upper() == "BUY" else OrderSide.SELL
-
-    # Crypto Market Order
-    if "/" in order.symbol:
-        return MarketOrderRequest(
-            symbol=order.symbol,
-            qty=order.qty,
-            side=side,
-            type=OrderType.MARKET,
-            time_in_force=TimeInForce.GTC,
-        )
-    else:
-        # Stock Market Order
-        return MarketOrderRequest(
-            symbol=order.symbol,
-            qty=order.qty,
-            side=side,
-            type=OrderType.MARKET,
-            time_in_force=TimeInForce.DAY
-        )
+    # side is already upper-cased by Order.from_dict / OrderBuilder
+    side = _SIDE_BUY if order.side == "BUY" else _SIDE_SELL
+
+    # Crypto trades around the clock (GTC); stock orders are day orders
+    tif = _TIF_CRYPTO if order.is_crypto else _TIF_EQUITY
+    return MarketOrderRequest(
+        symbol=order.symbol,
+        qty=order.qty,
+        side=side,
+        type=OrderType.MARKET,
+        time_in_force=tif,
+    )
 
     # LIMIT ORDER
     # if order.price is not None:
@@ -1,31 +1,49 @@
 # order_manager.py
+import asyncio
+import os
+import sys
 import time as t
-from csv import DictWriter
-import copy
-from dataclasses import asdict
+from logging import INFO
+from csv import DictWriter, writer as csv_writer
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from itertools import count
-from typing import Optional
-from datetime import datetime, time
+from typing import List, Optional, Tuple
+from datetime import datetime, time as dt_time
 import pytz
 
-from order import Order, to_alpaca_order
+from order import Order, _as_dict, to_alpaca_order
 from logger import Logger
 from matching_engine import MatchingEngine as ME
-from gateway import log_order_event
+from gateway import shared_log_sink
+
+
+_EASTERN = pytz.timezone("US/Eastern")
+_MARKET_OPEN = dt_time(9, 30)
+_MARKET_CLOSE = dt_time(16, 0)
+
+# Event-log name per execution status; anything else only reaches the audit trail
+_STATUS_EVENTS = {"FILLED": "filled", "PARTIAL": "partially_filled", "CANCELLED": "cancelled"}
+_EXECUTED_STATUSES = frozenset(("FILLED", "PARTIAL"))
+
+# Verdict cached per epoch second: (second, is_open), replaced as one tuple
+_market_open_cache = (None, False)
 
 
 def is_market_open_now():
-    eastern = pytz.timezone("US/Eastern")
-    now = datetime.now(eastern)
+    global _market_open_cache
+    sec = int(t.time())
+    cached_sec, cached_open = _market_open_cache
+    if sec == cached_sec:
+        return cached_open
 
-    # Check weekday (0=Mon, 6=Sun)
-    if now.weekday() > 4:
-        return False
+    now = datetime.fromtimestamp(sec, _EASTERN)
 
-    market_open = time(9, 30)
-    market_close = time(16, 0)
+    # Check weekday (0=Mon, 6=Sun)
+    is_open = now.weekday() <= 4 and _MARKET_OPEN <= now.time() <= _MARKET_CLOSE
 
-    return market_open <= now.time() <= market_close
+    _market_open_cache = (sec, is_open)
+    return is_open
 
 
 class OrderManager:
@@ -34,13 +52,75 @@ class OrderManager:
     It processes Order objects directly (no socket, no JSON).
     """
 
-    def __init__(self, trading_client, risk_engine, simulated: bool = False):
+    ORDER_LOG_FIELDS = ["id", "side", "symbol", "qty", "price", "ts"]
+
+    def __init__(self, trading_client, risk_engine, simulated: bool = False, order_log_path: Optional[str] = None):
         self._order_id_counter = count(1)
         self.trading_client = trading_client
         self._risk_engine = risk_engine
         self._simulated = simulated
         self.orders = []
         self.logger = Logger()
+        # Serializes "risk check + reserve" across concurrent process_order_async calls
+        self._async_risk_lock = asyncio.Lock()
+        # Audit rows and Logger entries are written off the order path by the shared sink
+        self._log_sink = shared_log_sink()
+
+        # Log every LOG_SAMPLE-th executed order in full; rejects are always logged.
+        # While sampling, fills are also summarised once per second.
+        self._log_sample = max(1, int(os.environ.get("LOG_SAMPLE", "1")))
+        self._order_counter = 0
+        self._fill_stats = {"count": 0, "total_qty": 0, "total_notional": 0.0}
+        self._fill_stats_since = t.monotonic()
+
+        # Optional order log: one buffered append handle kept open and written at
+        # fill time. The owner calls close() to flush and release it.
+        self._csv_fp = None
+        self._csv_writer = None
+        if order_log_path is not None:
+            self._csv_fp = open(order_log_path, "a", newline="", buffering=64 * 1024)
+            self._csv_writer = DictWriter(self._csv_fp, fieldnames=self.ORDER_LOG_FIELDS)
+            if os.path.getsize(order_log_path) == 0:
+                self._csv_writer.writeheader()
+
+    def _record_order(self, order: Order, filled_order: Order):
+        """Keep a filled/partially filled order and append its execution to the order log."""
+        self.orders.append(order)
+        if self._csv_writer is not None:
+            self._csv_writer.writerow({
+                "id": filled_order.id,
+                "side": filled_order.side,
+                "symbol": filled_order.symbol,
+                "qty": filled_order.qty,
+                "price": filled_order.price,
+                "ts": filled_order.ts,
+            })
+
+    def save_orders_to_csv(self, filepath: str = "order_export.csv"):
+        """
+        Append every recorded order to a CSV in one batch (e.g. an end-of-day export).
+        A single writerows call streams the tuples through the C csv writer.
+        Fills are already streamed to the order log, so it can't be the export target.
+        """
+        if self._csv_fp is not None and os.path.abspath(filepath) == os.path.abspath(self._csv_fp.name):
+            raise ValueError(f"{filepath} is the live order log; export to a different file")
+        write_header = not os.path.exists(filepath) or os.path.getsize(filepath) == 0
+        with open(filepath, "a", newline="") as f:
+            writer = csv_writer(f)
+            if write_header:
+                writer.writerow(self.ORDER_LOG_FIELDS)
+            writer.writerows((o.id, o.side, o.symbol, o.qty, o.price, o.ts) for o in self.orders)
+        return filepath
+
+    def flush_logs(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued audit/log events to be written."""
+        return self._log_sink.flush(timeout)
+
+    def close(self):
+        """Flush pending log events and close the order log, if one is open."""
+        self.flush_logs(timeout=5.0)
+        if self._csv_fp is not None and not self._csv_fp.closed:
+            self._csv_fp.close()
 
 
     def process_order(self, order: Order) -> dict:
@@ -51,19 +131,157 @@ class OrderManager:
             order = Order(side="BUY", symbol="AAPL", qty=10, price=170)
             om.process_order(order)
         """
+        # Validation and risk run before anything is stamped or logged
+        ok, msg = self._preflight(order)
+        if not ok:
+            return {"ok": False, "msg": msg}
+        self._stamp_order(order)
+
+        # Simulate execution via matching engine
+        if self._simulated:
+            response = ME.simulate_execution(order)
+
+        else:
+            alpaca_order = to_alpaca_order(order)
+            submitted = self.trading_client.submit_order(alpaca_order)
+            self._risk_engine.invalidate()
+            print(f"Submitted order: {submitted}")
+            response = self._alpaca_response(submitted)
+
+        return self._apply_response(order, response)
+
+
+    async def process_order_async(self, order: Order) -> dict:
+        """
+        Coroutine version of process_order for the live path.
+
+        alpaca-py's TradingClient is blocking, so the risk check's account reads and
+        submit_order run in worker threads; several orders awaited together (see
+        process_orders_async) overlap their submissions. Checks run one at a time,
+        and each accepted order is reserved on the risk engine until its submission
+        finishes, so a batch can't jointly exceed the limits by passing against one
+        account snapshot. Simulated orders have no I/O and are processed inline.
+        """
+        if self._simulated:
+            return self.process_order(order)
+
+        async with self._async_risk_lock:
+            ok, msg = await asyncio.to_thread(self._preflight, order)
+            if not ok:
+                return {"ok": False, "msg": msg}
+            self._risk_engine.reserve(order)
+
+        try:
+            self._stamp_order(order)
+            alpaca_order = to_alpaca_order(order)
+            submitted = await asyncio.to_thread(self.trading_client.submit_order, alpaca_order)
+        finally:
+            # The next check refetches the account, which now includes this order
+            async with self._async_risk_lock:
+                self._risk_engine.invalidate()
+                self._risk_engine.release(order)
+        print(f"Submitted order: {submitted}")
+        return self._apply_response(order, self._alpaca_response(submitted))
+
+
+    async def process_orders_async(self, orders: List[Order]) -> List[dict]:
+        """Submit independent orders concurrently; results are in input order."""
+        return list(await asyncio.gather(*(self.process_order_async(order) for order in orders)))
+
+
+    @staticmethod
+    def _alpaca_response(submitted) -> dict:
+        """Parses response from Alpaca into the matching engine's response shape."""
+        response = {"qty": submitted.filled_qty, "price": submitted.filled_avg_price}
+        # TODO: all statuses are pending_new by default so does not really affect anything here
+        if submitted.status == "filled":
+            response["status"] = "FILLED"
+        elif submitted.status == "canceled":
+            response["status"] = "CANCELED"
+        elif submitted.status == "partially_filled":
+            response["status"] = "PARTIAL"
+        else:
+            response["status"] = sys.intern(str(submitted.status))
+        return response
+
+
+    def process_orders_batch(self, orders: List[Order], max_workers: int = 8) -> List[dict]:
+        """
+        Process many simulated orders at once (e.g. an end-of-day replay).
+
+        Only MatchingEngine.simulate_batch, which is a pure function of its
+        orders, runs on the thread pool, one contiguous chunk per worker. Risk checks, position updates and
+        logging stay on the calling thread, in submission order.
+        Live (Alpaca) orders are processed one by one.
+        """
+        if not self._simulated:
+            return [self.process_order(order) for order in orders]
+
+        results: List[Optional[dict]] = [None] * len(orders)
+        pending = []
+        for i, order in enumerate(orders):
+            msg = self._validate(order)
+            if msg is not None:
+                results[i] = {"ok": False, "msg": msg}
+            else:
+                pending.append(i)
+
+        to_simulate = [orders[i] for i in pending]
+        chunk = max(1, -(-len(to_simulate) // max_workers))
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            chunks = ex.map(ME.simulate_batch, [to_simulate[j:j + chunk] for j in range(0, len(to_simulate), chunk)])
+            responses = [response for batch in chunks for response in batch]
+
+        # Risk depends on fills applied so far, so it is checked here in order
+        for i, response in zip(pending, responses):
+            order = orders[i]
+            if not self._risk_engine.check(order):
+                results[i] = self._reject_risk(order)
+            else:
+                self._stamp_order(order)
+                results[i] = self._apply_response(order, response)
+
+        return results
+
+
+    def _validate(self, order: Order) -> Optional[str]:
+        """Basic field and trading-hours checks. Returns an error message, or None if valid."""
 
         # Validate basic fields (optional: remove if you handle in Order class)
         if order.side not in ("BUY", "SELL"):
-            return {"ok": False, "msg": "Invalid side (must be BUY or SELL)"}
+            return "Invalid side (must be BUY or SELL)"
 
         if order.qty <= 0:
-            return {"ok": False, "msg": "Quantity must be > 0"}
+            return "Quantity must be > 0"
 
         if order.price <= 0:
-            return {"ok": False, "msg": "Price must be > 0"}
+            return "Price must be > 0"
+
+        if not order.is_crypto and not is_market_open_now(): # Ensure market is open for equity trades
+            return "Equity trades must be made during trading hours"
+
+        return None
+
+
+    def _preflight(self, order: Order) -> Tuple[bool, Optional[str]]:
+        """Run validation then risk checks. Returns (ok, msg); risk rejections are logged here."""
+        msg = self._validate(order)
+        if msg is not None:
+            return False, msg
+
+        # Run risk checks (the live engine also looks at the Alpaca account)
+        if self._simulated:
+            passed = self._risk_engine.check(order)
+        else:
+            passed = self._risk_engine.check(order, self.trading_client)
+        if not passed:
+            return False, self._reject_risk(order)["msg"]
+
+        return True, None
+
 
-        if "/" not in order.symbol and not is_market_open_now(): # Ensure market is open for equity trades
-            return {"ok": False, "msg": "Equity trades must be made during trading hours"}
+    def _stamp_order(self, order: Order):
+        """Stamp ts/id on an accepted order and log the send."""
 
         # Assign timestamp if missing
         if order.ts is None:
@@ -73,82 +291,71 @@ class OrderManager:
         if order.id is None:
             order.id = next(self._order_id_counter)
 
-        # Log send
-        log_order_event(order, event_type="sent")
-
-        # Simulate execution via matching engine
+        # Log send (live orders are already in Alpaca's own audit trail)
         if self._simulated:
+            self._log_sink.post_order_event(order, event_type="sent")
 
-            # Run risk checks
-            if not self._risk_engine.check(order):
-                self.logger.log("OrderManager", {"reason": "Order failed risk checks"})
-                log_order_event(order, event_type="rejected", status="risk_check_failed", note="risk_check_failed")
-                return {"ok": False, "msg": "risk_check_failed"}
 
-            response = ME.simulate_execution(order)
+    def _record_fill(self, filled_order: Order):
+        """Accumulate fill totals and flush them to the logger about once a second while sampling."""
+        if self._log_sample == 1:
+            return
 
+        stats = self._fill_stats
+        stats["count"] += 1
+        stats["total_qty"] += filled_order.qty
+        stats["total_notional"] += filled_order.qty * (filled_order.price or 0.0)
 
-        else:
-            # Run risk checks
-            if not self._risk_engine.check(order, self.trading_client):
-                self.logger.log("OrderManager", {"reason": "Order failed risk checks"})
-                log_order_event(order, event_type="rejected", status="risk_check_failed", note="risk_check_failed")
-                return {"ok": False, "msg": "risk_check_failed"}
+        now = t.monotonic()
+        if now - self._fill_stats_since >= 1.0:
+            if self.logger.is_enabled_for(INFO):
+                self._log_sink.post_log("OrderManagerFills", dict(stats))
+            stats["count"] = 0
+            stats["total_qty"] = 0
+            stats["total_notional"] = 0.0
+            self._fill_stats_since = now
 
-            alpaca_order = to_alpaca_order(order)
-            submitted = self.trading_client.submit_order(alpaca_order)
-            print(f"Submitted order: {submitted}")
 
-            # Parses response from Alpaca
-            response = {"qty": submitted.filled_qty, "price": submitted.filled_avg_price}
-            # TODO: all statuses are pending_new by default so does not really affect anything here
-            if submitted.status == "filled":
-                response["status"] = "FILLED"
-            elif submitted.status == "canceled":
-                response["status"] = "CANCELED"
-            elif submitted.status == "partially_filled":
-                response["status"] = "PARTIAL"
-            else:
-                response["status"] = submitted.status
+    def _reject_risk(self, order: Order) -> dict:
+        if self.logger.is_enabled_for(INFO):
+            self._log_sink.post_log("OrderManager", {"reason": "Order failed risk checks"})
+        self._log_sink.post_order_event(order, event_type="rejected", status="risk_check_failed", note="risk_check_failed")
+        return {"ok": False, "msg": "risk_check_failed"}
+
 
+    def _apply_response(self, order: Order, response: dict) -> dict:
+        """Record an execution response: positions, order log, audit log."""
 
-        # Build filled version (deep copy)
-        filled_order = copy.deepcopy(order)
-        filled_order.qty = response.get("qty", filled_order.qty)
-        filled_order.price = response.get("price", filled_order.price)
+        # Build filled version (shallow field copy; Order only holds scalars)
+        filled_order = replace(order, qty=response.get("qty", order.qty), price=response.get("price", order.price))
 
         # Log based on status
         status = response["status"]
 
-        # Apply risk/cash/position updates only on simulated executed quantity
-        if self._simulated and status in ("FILLED", "PARTIAL") and filled_order.qty > 0:
-            self._risk_engine.update_position(filled_order, filled_qty=filled_order.qty)
+        executed = status in _EXECUTED_STATUSES
 
-        if status == "CANCELLED":
-            self.logger.log(
-                "OrderManager",
-                {"reason": f"Order Cancelled {order.id}: "
-                           f"{order.side} {order.qty} {order.symbol} @ {order.price:.2f}"}
-            )
-        elif status == "PARTIAL":
-            self.orders.append(order)
-            self.logger.log(
-                "OrderManager",
-                {"reason": f"Order Partially Filled {order.id}: "
-                           f"{filled_order.side} {filled_order.qty} "
-                           f"{filled_order.symbol} @ {filled_order.price:.2f}"}
-            )
-        elif status == "FILLED":
-            self.orders.append(order)
-            self.logger.log(
+        # Apply risk/cash/position updates only on simulated executed quantity
+        if executed:
+            if self._simulated and filled_order.qty > 0:
+                self._risk_engine.update_position(filled_order, filled_qty=filled_order.qty)
+            self._record_fill(filled_order)
+            self._record_order(order, filled_order)
+
+        self._order_counter += 1
+        event = _STATUS_EVENTS.get(status)
+        # Unsampled or silenced orders keep the order log and audit trail but skip the event entry
+        if event is not None and not self._order_counter % self._log_sample and self.logger.is_enabled_for(INFO):
+            # Cancels report what was asked for, fills what was executed
+            src = filled_order if executed else order
+            # Log structured fields; formatting is deferred to whoever renders the entry
+            self._log_sink.post_log(
                 "OrderManager",
-                {"reason": f"Order Filled {order.id}: "
-                           f"{filled_order.side} {filled_order.qty} "
-                           f"{filled_order.symbol} @ {filled_order.price:.2f}"}
+                {"event": event, "id": order.id, "side": src.side,
+                 "qty": src.qty, "symbol": src.symbol, "price": src.price}
             )
 
         # Logs the order status
-        log_order_event(
+        self._log_sink.post_order_event(
             order,
             event_type=status.lower(),
             status=status,
@@ -160,7 +367,7 @@ class OrderManager:
         return {
             "ok": True,
             "status": status,
-            "order": asdict(order),
+            "order": _as_dict(order),
             "filled_qty": filled_order.qty,
             "filled_price": filled_order.price
         }
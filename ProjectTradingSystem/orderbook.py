@@ -1,168 +1,311 @@
 # orderbook.py
-import heapq
 import time
+from itertools import count
 from typing import Dict, List, Optional, Tuple
 
+from sortedcontainers import SortedDict
+
+# Upper bound on recycled dicts kept per pool
+_POOL_CAP = 1024
+
+# Resolve incoming side strings to the interned literals used in comparisons
+_CANONICAL_SIDES = {"BUY": "BUY", "SELL": "SELL"}
+
+
+class OrderRec:
+    """Internal record for a resting/processed order; slots keep it small and attribute reads cheap."""
+
+    __slots__ = ("order_id", "side", "symbol", "price", "qty", "ts", "active", "seq", "version")
+
+    def __init__(self, order_id=None, side=None, symbol=None, price=0.0, qty=0, ts=0.0,
+                 active=False, seq=0, version=0):
+        self.order_id = order_id
+        self.side = side
+        self.symbol = symbol
+        self.price = price
+        self.qty = qty
+        self.ts = ts
+        self.active = active
+        self.seq = seq
+        self.version = version
+
+    def __getitem__(self, field: str):
+        # Dict-style reads (rec["qty"]) still work for code written against dict records
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __repr__(self) -> str:
+        return (f"OrderRec(order_id={self.order_id!r}, side={self.side!r}, price={self.price!r}, "
+                f"qty={self.qty!r}, active={self.active!r})")
+
 
 class OrderBook:
     """
-    Heap-backed order book enforcing price-time priority.
+    Price-level order book enforcing price-time priority.
 
-    - Internally maintains min-heap asks and max-heap bids (via negated price) using
-      (price_key, seq, order_id, version) tuples so newer versions supersede stale ones.
+    - Each side keeps an ascending SortedDict of price -> aggregate resting qty plus a
+      FIFO of live records per price level (best bid is the last level, best ask the first).
+    - A level FIFO is an insertion-ordered dict keyed by order_id, so cancels/modifies
+      drop a record in O(1) instead of scanning the level.
+    - The best price is the first key of the level map and the order to fill is the head of
+      that level's FIFO, so best_bid/best_ask are O(1) and never skip stale entries.
     - Supports add_order (auto-matching), modify_order (re-prices/updates qty), and cancel_order.
     - Matching occurs against the opposite side with standard crossing logic and records trade fills.
     """
 
     def __init__(self):
-        # Heaps store (price_key, seq, order_id, version); price_key negated for bids.
-        self.bids: List[Tuple[float, int, int, int]] = []
-        self.asks: List[Tuple[float, int, int, int]] = []
-        self.orders: Dict[int, Dict] = {}
-        self._seq = 0
-
-    def _next_seq(self) -> int:
-        """Monotonic sequence for time-priority tie breaking."""
-        self._seq += 1
-        return self._seq
-
-    def _normalize(self, order) -> Dict:
+        self.orders: Dict[int, OrderRec] = {}
+        # Monotonic sequence for time-priority tie breaking
+        self._seq_iter = count(1)
+        # price -> resting qty, both ascending (no key function); best bid is the last level
+        self._bid_levels: SortedDict = SortedDict()
+        self._ask_levels: SortedDict = SortedDict()
+        # price -> {order_id: record}, insertion order is time priority
+        self._bid_fifo: Dict[float, Dict[int, OrderRec]] = {}
+        self._ask_fifo: Dict[float, Dict[int, OrderRec]] = {}
+        # Free lists of recycled trade dicts / order records (single-threaded use only)
+        self._trade_pool: List[Dict] = []
+        self._rec_pool: List[OrderRec] = []
+
+    def _normalize(self, order) -> OrderRec:
         """Normalize dict/Order-like input into internal record with versioning."""
-        oid = getattr(order, "id", None)
+        # Dispatch on the input type once, then read every field the same way
         if isinstance(order, dict):
-            oid = order.get("order_id", oid)
+            get = order.get
+            oid = get("order_id")
+            side = get("side")
+            symbol = get("symbol")
+            price = get("price")
+            qty = get("qty")
+            ts = get("ts")
+        else:
+            oid = order.id
+            side = order.side
+            symbol = order.symbol
+            price = order.price
+            qty = order.qty
+            ts = order.ts
+
         if oid is None:
             raise ValueError("order_id is required")
 
-        side = getattr(order, "side", None) if not isinstance(order, dict) else order.get("side")
-        symbol = getattr(order, "symbol", None) if not isinstance(order, dict) else order.get("symbol")
-        price = getattr(order, "price", None) if not isinstance(order, dict) else order.get("price")
-        qty = getattr(order, "qty", None) if not isinstance(order, dict) else order.get("qty")
-        ts = getattr(order, "ts", None) if not isinstance(order, dict) else order.get("ts")
-
-        if side not in {"BUY", "SELL"}:
+        side = _CANONICAL_SIDES.get(side) if type(side) is str else None
+        if side is None:
             raise ValueError("side must be BUY or SELL")
         if price is None or qty is None:
             raise ValueError("price and qty are required")
 
-        base = self.orders.get(oid, {})
-        version = base.get("version", 0) + 1
-
-        return {
-            "order_id": oid,
-            "side": side,
-            "symbol": symbol,
-            "price": float(price),
-            "qty": int(qty),
-            "ts": float(ts) if ts is not None else time.time(),
-            "active": True,
-            "seq": self._next_seq(),
-            "version": version,
-        }
-
-    def _push(self, rec: Dict):
-        """Push the record to the appropriate heap using price-time priority."""
-        entry = (
-            -rec["price"] if rec["side"] == "BUY" else rec["price"],
-            rec["seq"],
-            rec["order_id"],
-            rec["version"],
-        )
-        heapq.heappush(self.bids if rec["side"] == "BUY" else self.asks, entry)
-
-    def _best(self, side: str) -> Tuple[Optional[float], Optional[Dict]]:
-        """Return best price and live order for the given side, skipping stale entries."""
-        heap = self.bids if side == "BUY" else self.asks
-        while heap:
-            _, _, oid, ver = heap[0]
-            rec = self.orders.get(oid)
-            if not rec or not rec["active"] or rec["qty"] <= 0 or rec["version"] != ver or rec["side"] != side:
-                heapq.heappop(heap)
-                continue
-            return rec["price"], rec
-        return None, None
-
-    def _crosses(self, incoming: Dict, resting_price: float) -> bool:
-        """Check if incoming crosses resting price."""
-        if incoming["side"] == "BUY":
-            return incoming["price"] >= resting_price
-        return incoming["price"] <= resting_price
+        base = self.orders.get(oid)
+        version = base.version + 1 if base is not None else 1
+
+        # Every slot is overwritten, so a recycled record needs no clearing
+        rec = self._rec_pool.pop() if self._rec_pool else OrderRec()
+        rec.order_id = oid
+        rec.side = side
+        rec.symbol = symbol
+        rec.price = float(price)
+        rec.qty = int(qty)
+        rec.ts = float(ts) if ts is not None else time.time()
+        rec.active = True
+        rec.seq = next(self._seq_iter)
+        rec.version = version
+        return rec
+
+    def _rest(self, rec: OrderRec):
+        """Queue a live record at the back of its price level."""
+        qty = rec.qty
+        if qty <= 0:
+            return
+        price = rec.price
+        if rec.side == "BUY":
+            levels, fifo = self._bid_levels, self._bid_fifo
+        else:
+            levels, fifo = self._ask_levels, self._ask_fifo
+        levels[price] = levels.get(price, 0) + qty
+        queue = fifo.get(price)
+        if queue is None:
+            fifo[price] = {rec.order_id: rec}
+        else:
+            queue[rec.order_id] = rec
+
+    def _unrest(self, rec: OrderRec):
+        """Take a live record off its price level (before cancel/modify/replace)."""
+        if not rec.active or rec.qty <= 0:
+            return
+        price = rec.price
+        if rec.side == "BUY":
+            levels, fifo = self._bid_levels, self._bid_fifo
+        else:
+            levels, fifo = self._ask_levels, self._ask_fifo
+        queue = fifo[price]
+        del queue[rec.order_id]
+        if queue:
+            levels[price] -= rec.qty
+        else:
+            del fifo[price]
+            del levels[price]
+
+    def _best(self, side: str) -> Tuple[Optional[float], Optional[OrderRec]]:
+        """Return best price and the order first in line at that price."""
+        if side == "BUY":
+            levels, fifo, top = self._bid_levels, self._bid_fifo, -1
+        else:
+            levels, fifo, top = self._ask_levels, self._ask_fifo, 0
+        if not levels:
+            return None, None
+        price = levels.peekitem(top)[0]
+        return price, next(iter(fifo[price].values()))
+
+    def reset(self):
+        """
+        Empty the book for reuse, recycling every order record into the free list.
+        Callers must not touch records or trades from before the reset.
+        """
+        pool = self._rec_pool
+        room = _POOL_CAP - len(pool)
+        if room > 0:
+            pool.extend(list(self.orders.values())[:room])
+        self.orders.clear()
+        self._bid_levels.clear()
+        self._ask_levels.clear()
+        self._bid_fifo.clear()
+        self._ask_fifo.clear()
 
     def _record_trade(self, buy_id: int, sell_id: int, price: float, qty: int) -> Dict:
-        """Build a trade record dictionary."""
-        return {
-            "buy_id": buy_id,
-            "sell_id": sell_id,
-            "price": price,
-            "qty": qty,
-            "ts": time.time(),
-        }
-
-    def _match(self, incoming: Dict) -> List[Dict]:
-        """Match incoming order against the opposite book, producing trade records."""
+        """Build a trade record dictionary, reusing a released one when available."""
+        trade = self._trade_pool.pop() if self._trade_pool else {}
+        trade["buy_id"] = buy_id
+        trade["sell_id"] = sell_id
+        trade["price"] = price
+        trade["qty"] = qty
+        trade["ts"] = time.time()
+        return trade
+
+    def release_trades(self, trades: List[Dict]):
+        """Hand trade dicts back for reuse. Callers must not touch them afterwards."""
+        pool = self._trade_pool
+        room = _POOL_CAP - len(pool)
+        if room > 0:
+            pool.extend(trades[:room])
+
+    def _match(self, incoming: OrderRec) -> List[Dict]:
+        """
+        Match incoming order against the opposite book, producing trade records.
+        The incoming order is not resting yet; callers queue any remainder afterwards.
+        """
+        if incoming.side == "BUY":
+            trades = self._match_buy(incoming)
+        else:
+            trades = self._match_sell(incoming)
+        if incoming.qty <= 0:
+            incoming.active = False
+        return trades
+
+    def _match_buy(self, incoming: OrderRec) -> List[Dict]:
+        """Lift asks from the lowest price up while they are at or below the buy limit."""
         trades: List[Dict] = []
-        counter_side = "SELL" if incoming["side"] == "BUY" else "BUY"
+        levels, fifo = self._ask_levels, self._ask_fifo
+        limit = incoming.price
+        buy_id = incoming.order_id
 
-        while incoming["qty"] > 0:
-            best_price, resting = self._best(counter_side)
-            if not resting or best_price is None:
+        while incoming.qty > 0 and levels:
+            best_price = levels.peekitem(0)[0]
+            if limit < best_price:
                 break
-            if not self._crosses(incoming, best_price):
+
+            queue = fifo[best_price]
+            resting = next(iter(queue.values()))
+            trade_qty = min(incoming.qty, resting.qty)
+            incoming.qty -= trade_qty
+            resting.qty -= trade_qty
+            trades.append(self._record_trade(buy_id, resting.order_id, resting.price, trade_qty))
+
+            if resting.qty <= 0:
+                resting.active = False
+                del queue[resting.order_id]
+            if queue:
+                levels[best_price] -= trade_qty
+            else:
+                del fifo[best_price]
+                del levels[best_price]
+
+        return trades
+
+    def _match_sell(self, incoming: OrderRec) -> List[Dict]:
+        """Hit bids from the highest price down while they are at or above the sell limit."""
+        trades: List[Dict] = []
+        levels, fifo = self._bid_levels, self._bid_fifo
+        limit = incoming.price
+        sell_id = incoming.order_id
+
+        while incoming.qty > 0 and levels:
+            best_price = levels.peekitem(-1)[0]
+            if limit > best_price:
                 break
 
-            trade_qty = min(incoming["qty"], resting["qty"])
-            trade_price = resting["price"]
-            incoming["qty"] -= trade_qty
-            resting["qty"] -= trade_qty
-            trades.append(
-                self._record_trade(
-                    buy_id=incoming["order_id"] if incoming["side"] == "BUY" else resting["order_id"],
-                    sell_id=incoming["order_id"] if incoming["side"] == "SELL" else resting["order_id"],
-                    price=trade_price,
-                    qty=trade_qty,
-                )
-            )
-
-            if resting["qty"] <= 0:
-                resting["active"] = False
-
-        if incoming["qty"] <= 0:
-            incoming["active"] = False
+            queue = fifo[best_price]
+            resting = next(iter(queue.values()))
+            trade_qty = min(incoming.qty, resting.qty)
+            incoming.qty -= trade_qty
+            resting.qty -= trade_qty
+            trades.append(self._record_trade(resting.order_id, sell_id, resting.price, trade_qty))
+
+            if resting.qty <= 0:
+                resting.active = False
+                del queue[resting.order_id]
+            if queue:
+                levels[best_price] -= trade_qty
+            else:
+                del fifo[best_price]
+                del levels[best_price]
 
         return trades
 
     def add_order(self, order) -> List[Dict]:
         """Add an order and immediately attempt matching. Returns list of trades."""
         rec = self._normalize(order)
-        self.orders[rec["order_id"]] = rec
-        self._push(rec)
+        prev = self.orders.get(rec.order_id)
+        if prev is not None:
+            # Re-using an id replaces the old record, so it leaves the book
+            self._unrest(prev)
+            if len(self._rec_pool) < _POOL_CAP:
+                self._rec_pool.append(prev)
+        self.orders[rec.order_id] = rec
         trades = self._match(rec)
+        if rec.active:
+            self._rest(rec)
         return trades
 
     def modify_order(self, order_id: int, new_qty: Optional[int] = None, new_price: Optional[float] = None) -> List[Dict]:
-        """Modify an existing active order; reprices with new seq/version and re-matches."""
+        """Modify an existing active order; reprices with new seq/version, re-matches and requeues."""
         rec = self.orders.get(order_id)
-        if not rec or not rec["active"]:
+        if not rec or not rec.active:
             return []
 
+        self._unrest(rec)
         if new_qty is not None:
-            rec["qty"] = int(new_qty)
+            rec.qty = int(new_qty)
         if new_price is not None:
-            rec["price"] = float(new_price)
-        rec["ts"] = time.time()
-        rec["seq"] = self._next_seq()
-        rec["version"] += 1
-        self._push(rec)
-        return self._match(rec)
+            rec.price = float(new_price)
+        rec.ts = time.time()
+        rec.seq = next(self._seq_iter)
+        rec.version += 1
+        trades = self._match(rec)
+        if rec.active:
+            self._rest(rec)
+        return trades
 
     def cancel_order(self, order_id: int) -> bool:
         """Cancel an active order."""
         rec = self.orders.get(order_id)
-        if not rec or not rec["active"]:
+        if not rec or not rec.active:
             return False
-        rec["active"] = False
-        rec["qty"] = 0
-        rec["version"] += 1
+        self._unrest(rec)
+        rec.active = False
+        rec.qty = 0
+        rec.version += 1
         return True
 
     def best_bid(self) -> Optional[float]:
@@ -175,16 +318,16 @@ class OrderBook:
         price, _ = self._best("SELL")
         return price
 
-    def depth(self) -> Dict[str, List[Tuple[float, int]]]:
-        """Aggregate visible depth by price level for bids/asks."""
-        bids: Dict[float, int] = {}
-        asks: Dict[float, int] = {}
-        for rec in self.orders.values():
-            if not rec["active"] or rec["qty"] <= 0:
-                continue
-            book = bids if rec["side"] == "BUY" else asks
-            book[rec["price"]] = book.get(rec["price"], 0) + rec["qty"]
-        return {
-            "bids": sorted([(p, q) for p, q in bids.items()], key=lambda x: -x[0]),
-            "asks": sorted([(p, q) for p, q in asks.items()], key=lambda x: x[0]),
-        }
+    def depth(self, levels: Optional[int] = None) -> Dict[str, List[Tuple[float, int]]]:
+        """
+        Aggregate visible depth by price level for bids/asks, best price first.
+        With levels=k only the k best levels per side are returned; the sorted level
+        maps are sliced at their best end, so a top-of-book snapshot doesn't copy the book.
+        """
+        bids = self._bid_levels.items()
+        asks = self._ask_levels.items()
+        if levels is None:
+            return {"bids": list(reversed(bids)), "asks": list(asks)}
+        if levels <= 0:
+            return {"bids": [], "asks": []}
+        return {"bids": bids[-levels:][::-1], "asks": asks[:levels]}
@@ -1,26 +1,92 @@
-from collections import deque
+import math
 from typing import Optional
 
 from strategy import MarketDataPoint
 from indicator_engine import IndicatorEngine
+from numba_compat import njit
+
+# Kernel return codes, index -> regime name
+_REGIMES = ("NEUTRAL", "TREND", "REVERSAL", "BREAKOUT")
+_NAN = math.nan
+# Number of recent ATR readings averaged into atr_mean
+_ATR_HISTORY = 50
+
+
+@njit(cache=True)
+def _score(price, ema9, ema21, ema50, prev_ema9, prev_ema21, atr14, prev_atr14, atr_mean, hi20, lo20, price_ago_5):
+    """
+    Score the regimes for one tick and return an index into _REGIMES.
+    Missing values are passed as NaN. As in the original truthiness checks, a value
+    of 0.0 also counts as missing wherever the check was `x and ...`.
+    """
+    has_atr_mean = atr_mean == atr_mean and atr_mean != 0.0
+    has_hi20 = hi20 == hi20 and hi20 != 0.0
+    has_lo20 = lo20 == lo20 and lo20 != 0.0
+    has_prev_atr = prev_atr14 == prev_atr14 and prev_atr14 != 0.0
+
+    # ----- BREAKOUT -----
+    breakout_score = 0
+    if has_atr_mean and atr14 > atr_mean * 1.5:
+        breakout_score += 3
+    if (has_hi20 and price > hi20) or (has_lo20 and price > lo20):
+        breakout_score += 3
+    if prev_ema9 == prev_ema9 and abs(ema9 - ema21) > abs(prev_ema9 - prev_ema21):
+        breakout_score += 2
+    if breakout_score >= 5:
+        return 3
+
+    # ----- REVERSAL -----
+    has_prev_emas = prev_ema9 == prev_ema9 and prev_ema9 != 0.0 and prev_ema21 == prev_ema21 and prev_ema21 != 0.0
+    reversal_score = 0
+    if has_prev_emas and ((prev_ema9 < prev_ema21 and ema9 > ema21) or (prev_ema9 > prev_ema21 and ema9 < ema21)):
+        reversal_score += 3
+    if (has_hi20 and price > hi20) or (has_lo20 and price < lo20):
+        reversal_score += 2
+    if has_atr_mean and atr14 > atr_mean * 1.3 and has_prev_atr and atr14 < prev_atr14:
+        reversal_score += 2
+    if reversal_score >= 5:
+        return 2
+
+    # ----- TREND -----
+    trend_score = 0
+    if (ema9 > ema21 and ema21 > ema50) or (ema9 < ema21 and ema21 < ema50):
+        trend_score += 4
+    if has_prev_atr and atr14 > prev_atr14 and has_atr_mean and atr14 < atr_mean * 1.5:
+        trend_score += 2
+    if price > price_ago_5 or price < price_ago_5:
+        trend_score += 1
+    if trend_score >= 5:
+        return 1
+
+    return 0
+
 
 class RegimeDetector:
     def __init__(self):
         self.prev_ema9 = None
         self.prev_ema21 = None
         self.prev_atr14 = None
-        self.atr_history = deque(maxlen=50)
+        # Last 50 nonzero ATRs as a preallocated ring; _atr_head is the next slot to write
+        self._atr_ring = [0.0] * _ATR_HISTORY
+        self._atr_head = 0
+        self._atr_count = 0
+        self._atr_sum = 0.0  # running sum of the ring
 
 
     def detect(self, price: float, engine: IndicatorEngine):
 
-        if len(engine.prices) < 20:
+        count = engine.price_count
+        if count < 20:
             return None
 
-        if engine.ema9 is None or engine.ema21 is None or engine.ema50 is None:
+        ema9 = engine.ema9
+        ema21 = engine.ema21
+        ema50 = engine.ema50
+        if ema9 is None or ema21 is None or ema50 is None:
             return None
-        
-        if engine.atr14 is None:
+
+        atr14 = engine.atr14
+        if atr14 is None:
             return None
 
         # Store previous
@@ -28,78 +94,37 @@ class RegimeDetector:
         prev_ema21 = self.prev_ema21
         prev_atr14 = self.prev_atr14
 
-        # Update history
-        if engine.atr14:
-            self.atr_history.append(engine.atr14)
-        atr_mean = sum(self.atr_history) / len(self.atr_history) if self.atr_history else None
-
-        # ----- BREAKOUT -----
-        atr_exploding = atr_mean and engine.atr14 > atr_mean * 1.5
-        range_break = (
-            (engine.high_n(20) and price > engine.high_n(20)) or
-            (engine.low_n(20) and price > engine.low_n(20))
-        )
-
-        ema_spread_widening = (
-            prev_ema9 is not None and 
-            abs(engine.ema9 - engine.ema21) > abs(prev_ema9 - prev_ema21)
-        )
-
-        breakout_score = 0
-        if atr_exploding: breakout_score += 3
-        if range_break: breakout_score += 3
-        if ema_spread_widening: breakout_score += 2
-        is_breakout = breakout_score >= 5
-
-        # ----- TREND -----
-        ema_bull = engine.ema9 > engine.ema21 > engine.ema50
-        ema_bear = engine.ema9 < engine.ema21 < engine.ema50
-        atr_rising = prev_atr14 and engine.atr14 > prev_atr14
-        not_breakout_vol = atr_mean and engine.atr14 < atr_mean * 1.5
-
-        price_ago_5 = engine.prices[-5] if len(engine.prices) >= 5 else price
-        directional_up = price > price_ago_5
-        directional_down = price < price_ago_5
-
-        trend_score = 0
-        if ema_bull or ema_bear: trend_score += 4
-        if atr_rising and not_breakout_vol: trend_score += 2
-        if directional_up or directional_down: trend_score += 1
-
-        is_trend = trend_score >= 5
-
-        # ----- REVERSAL -----
-        ema_cross_bull = prev_ema9 and prev_ema21 and prev_ema9 < prev_ema21 and engine.ema9 > engine.ema21
-        ema_cross_bear = prev_ema9 and prev_ema21 and prev_ema9 > prev_ema21 and engine.ema9 < engine.ema21
-
-        swing_break = (
-            (engine.high_n(20) and price > engine.high_n(20)) or
-            (engine.low_n(20) and price < engine.low_n(20))
-        )
-
-        atr_spike = atr_mean and engine.atr14 > atr_mean * 1.3
-        atr_drop = prev_atr14 and engine.atr14 < prev_atr14
-
-        reversal_score = 0
-        if ema_cross_bull or ema_cross_bear: reversal_score += 3
-        if swing_break: reversal_score += 2
-        if atr_spike and atr_drop: reversal_score += 2
-
-        is_reversal = reversal_score >= 5
-
-        # ----- PRIORITY -----
-        if is_breakout:
-            regime = "BREAKOUT"
-        elif is_reversal:
-            regime = "REVERSAL"
-        elif is_trend:
-            regime = "TREND"
-        else:
-            regime = "NEUTRAL"
-
         # save for next tick
-        self.prev_ema9 = engine.ema9
-        self.prev_ema21 = engine.ema21
-        self.prev_atr14 = engine.atr14
-
-        return regime
+        self.prev_ema9 = ema9
+        self.prev_ema21 = ema21
+        self.prev_atr14 = atr14
+
+        # Update history, keeping the running sum in step with the ring's eviction
+        if atr14:
+            ring = self._atr_ring
+            head = self._atr_head
+            if self._atr_count == _ATR_HISTORY:
+                self._atr_sum -= ring[head]
+            else:
+                self._atr_count += 1
+            ring[head] = atr14
+            self._atr_head = (head + 1) % _ATR_HISTORY
+            self._atr_sum += atr14
+        atr_mean = self._atr_sum / self._atr_count if self._atr_count else None
+
+        hi20 = engine.high_n(20)
+        lo20 = engine.low_n(20)
+        price_ago_5 = engine.price_ago(5) if count >= 5 else price
+
+        code = _score(
+            price, ema9, ema21, ema50,
+            _NAN if prev_ema9 is None else prev_ema9,
+            _NAN if prev_ema21 is None else prev_ema21,
+            atr14,
+            _NAN if prev_atr14 is None else prev_atr14,
+            _NAN if atr_mean is None else atr_mean,
+            _NAN if hi20 is None else hi20,
+            _NAN if lo20 is None else lo20,
+            price_ago_5,
+        )
+        return _REGIMES[code]
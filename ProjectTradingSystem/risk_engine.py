@@ -1,104 +1,146 @@
 # risk_engine.py
+import time
 from threading import Lock
+from typing import Any, Dict, Optional, Tuple
 from order import Order
-from logger import Logger
+from gateway import AsyncLogSink, shared_log_sink
+
+
+def _log_failure(rejects: AsyncLogSink, reason: str, *args):
+    """Queue a failed check for logging; the %-style reason is formatted off the trading thread."""
+    rejects.post_reason("OrderFailed", reason, *args)
 
 
 class RiskEngineLive:
-    _instance = None
-    _lock = Lock()
-
-
-    def __new__(cls, max_order_value, max_asset_percentage):
-        """
-        Thread-safe Singleton constructor.
-        Ensures only one RiskEngine ever exists.
-        """
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._initialized = False
-        return cls._instance
-
-
-    def __init__(self, max_order_value=1000, max_asset_percentage=0.1):
-        """
-        Guard against repeated initialization.
-        """
-        if self._initialized:
-            return
 
+    def __init__(self, max_order_value=1000, max_asset_percentage=0.1, cache_ttl: float = 0.25):
         self.max_order_value = max_order_value
         self.max_asset_percentage = max_asset_percentage
+        # Rejects are queued as raw fields and logged by the shared sink's thread
+        self._rejects = shared_log_sink()
+
+        # Short-lived snapshots of the Alpaca account, refetched after cache_ttl or invalidate()
+        self._ttl = cache_ttl
+        self._positions_by_symbol: Optional[Tuple[Dict[str, Any], float]] = None  # ({symbol: position}, fetched_at)
+        self._account_cache: Optional[Tuple[Any, float]] = None                   # (account, fetched_at)
+
+        # Orders that passed check() but whose submission hasn't completed, so they
+        # aren't in the account snapshot yet; check() counts them against it
+        self._reserved_cash = 0.0                      # in-flight buy notional
+        self._reserved_value: Dict[str, float] = {}    # symbol -> in-flight buy notional
+        self._reserved_sell: Dict[str, float] = {}     # symbol -> in-flight sell qty
+
+
+    def _positions(self, trading_client) -> Dict[str, Any]:
+        now = time.monotonic()
+        cached = self._positions_by_symbol
+        if cached is not None and now - cached[1] < self._ttl:
+            return cached[0]
 
-        self._initialized = True
+        by_symbol = {asset.symbol: asset for asset in trading_client.get_all_positions()}
+        self._positions_by_symbol = (by_symbol, now)
+        return by_symbol
+
+
+    def _account(self, trading_client):
+        now = time.monotonic()
+        cached = self._account_cache
+        if cached is not None and now - cached[1] < self._ttl:
+            return cached[0]
+
+        account = trading_client.get_account()
+        self._account_cache = (account, now)
+        return account
+
+
+    def invalidate(self):
+        """Drop cached account/positions after an order is submitted."""
+        self._positions_by_symbol = None
+        self._account_cache = None
+
+
+    def reserve(self, order: Order):
+        """Count an accepted order against later checks until release(order)."""
+        if order.sign < 0:
+            self._reserved_sell[order.symbol] = self._reserved_sell.get(order.symbol, 0.0) + order.qty
+        else:
+            value = order.qty * order.price
+            self._reserved_cash += value
+            self._reserved_value[order.symbol] = self._reserved_value.get(order.symbol, 0.0) + value
+
+
+    def release(self, order: Order):
+        """Drop a reservation once the order's submission has finished (call invalidate() with it)."""
+        if order.sign < 0:
+            self._reserved_sell[order.symbol] -= order.qty
+        else:
+            value = order.qty * order.price
+            self._reserved_cash -= value
+            self._reserved_value[order.symbol] -= value
 
 
     def check(self, order: Order, trading_client) -> bool:
-        """Return True if order is allowed, False otherwise."""
+        """Return True if order is allowed, False otherwise. Reserved orders count as already placed."""
         print(f"Checking order: {order}")
 
         # Finds the stats for the asset if portfolio holds any
-        asset_stats = None
-        for asset in trading_client.get_all_positions():
-            if asset.symbol == order.symbol.replace("/", ""):
-                asset_stats = asset
+        asset_stats = self._positions(trading_client).get(order.symbol.replace("/", ""))
         if asset_stats is None:
             print(f"No stats found for {order.symbol}. Continuing risk checks.")
 
-        # Cash constraint
-        cash_balance = float(trading_client.get_account().non_marginable_buying_power)
-        if order.side == "BUY" and order.qty * order.price > cash_balance:
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"Order value exceeds cash balance {cash_balance}"}
-            )
-            return False
+        # One account snapshot serves both the cash and equity checks
+        account = self._account(trading_client)
 
-        # Check enough position to sell
-        if order.side =="SELL" and (asset_stats is None or float(asset_stats.qty) < order.qty):
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"Order qty {order.qty} exceeds current position size of {asset_stats.qty if asset_stats else 0}"}
-            )
+        qty = order.qty
+        if order.sign < 0:
+            # Check enough position to sell, net of sells still in flight
+            held = float(asset_stats.qty) if asset_stats else 0.0
+            held -= self._reserved_sell.get(order.symbol, 0.0)
+            if asset_stats is None or held < qty:
+                _log_failure(self._rejects, "Order qty %s exceeds current position size of %s", qty, held)
+                return False
+            return True
+
+        # Every buy-side limit is on the same notional
+        order_value = qty * order.price
+
+        # Cash constraint
+        cash_balance = float(account.non_marginable_buying_power) - self._reserved_cash
+        if order_value > cash_balance:
+            _log_failure(self._rejects, "Order value exceeds cash balance %s", cash_balance)
             return False
 
         # Value constraint
-        if order.side == "BUY" and order.qty * order.price > self.max_order_value:
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"Order qty {order.qty} exceeds max order value {self.max_order_value}"}
-            )
+        if order_value > self.max_order_value:
+            _log_failure(self._rejects, "Order qty %s exceeds max order value %s", qty, self.max_order_value)
             return False
 
-        # Relative size constraint
-        equity = float(trading_client.get_account().equity)
-        if asset_stats and order.side == "BUY" and order.qty * order.price + float(asset_stats.market_value) > equity * self.max_asset_percentage:
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"New order causes symbol position to exceed equity share of {equity * self.max_asset_percentage}"}
-            )
-            return False
+        # Relative size constraint, including buys of this symbol still in flight
+        reserved_value = self._reserved_value.get(order.symbol, 0.0)
+        if asset_stats or reserved_value:
+            held_value = float(asset_stats.market_value) if asset_stats else 0.0
+            max_asset_value = float(account.equity) * self.max_asset_percentage
+            if order_value + held_value + reserved_value > max_asset_value:
+                _log_failure(self._rejects, "New order causes symbol position to exceed equity share of %s", max_asset_value)
+                return False
 
         return True
 
 
-class RiskEngineSim:
-    _instance = None
-    _lock = Lock()
+class SymbolRiskState:
+    """Risk counters for one symbol, guarded by that symbol's own lock."""
+
+    __slots__ = ("orders", "net", "buy_total", "sell_total", "lock")
 
+    def __init__(self):
+        self.orders = []        # filled orders (audit history)
+        self.net = 0            # signed net qty
+        self.buy_total = 0      # cumulative buy qty
+        self.sell_total = 0     # cumulative sell qty
+        self.lock = Lock()
 
-    def __new__(cls, max_order_size, max_position, cash_balance, max_total_buy=None, max_total_sell=None):
-        """
-        Thread-safe Singleton constructor.
-        Ensures only one RiskEngine ever exists.
-        """
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._initialized = False
-        return cls._instance
 
+class RiskEngineSim:
 
     def __init__(
         self,
@@ -108,71 +150,78 @@ class RiskEngineSim:
         max_total_buy=None,
         max_total_sell=None,
     ):
-        """
-        Guard against repeated initialization.
-        """
-        if self._initialized:
-            return
-
         self.max_order_size = max_order_size
         self.max_position = max_position
         self.cash_balance = cash_balance
         self.max_total_buy = max_total_buy if max_total_buy is not None else float("inf")
         self.max_total_sell = max_total_sell if max_total_sell is not None else float("inf")
+        # Rejects are queued as raw fields and logged by the shared sink's thread
+        self._rejects = shared_log_sink()
+
+        # symbol -> SymbolRiskState; checks on different symbols never share a lock.
+        # _shards_lock is only taken the first time a symbol is seen.
+        self._shards = {}
+        self._shards_lock = Lock()
+        self._cash_lock = Lock()
+
+
+    def _shard(self, symbol: str) -> SymbolRiskState:
+        shard = self._shards.get(symbol)
+        if shard is None:
+            with self._shards_lock:
+                shard = self._shards.setdefault(symbol, SymbolRiskState())
+        return shard
+
+
+    def reset(self, cash_balance=None):
+        """Clear all positions/totals (e.g. between backtest runs), optionally resetting cash."""
+        with self._shards_lock:
+            self._shards = {}
+        if cash_balance is not None:
+            with self._cash_lock:
+                self.cash_balance = cash_balance
 
-        self.positions = {}  # symbol -> list of orders
-        self.buy_totals = {}  # symbol -> cumulative buy qty
-        self.sell_totals = {}  # symbol -> cumulative sell qty
 
-        self._initialized = True
+    def net_position(self, symbol: str) -> int:
+        shard = self._shards.get(symbol)
+        return shard.net if shard is not None else 0
 
 
     def check(self, order: Order) -> bool:
         """Return True if order is allowed, False otherwise."""
+        qty = order.qty
+        sign = order.sign
+        is_buy = sign > 0
+
+        # Cheapest constraints first, so most rejects never touch the symbol shard
 
         # Size constraint
-        if order.qty > self.max_order_size:
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"Order qty {order.qty} exceeds max order size {self.max_order_size}"}
-            )
+        if qty > self.max_order_size:
+            _log_failure(self._rejects, "Order qty %s exceeds max order size %s", qty, self.max_order_size)
             return False
 
-        # Net position constraint
-        current_pos = sum(o.qty if o.side == "BUY" else -o.qty for o in self.positions.get(order.symbol, []))
-        prospective_pos = current_pos + (order.qty if order.side == "BUY" else -order.qty)
-        if abs(prospective_pos) > self.max_position:
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"Order would exceed max position {self.max_position} (current {current_pos})"}
-            )
+        # Cash constraint (buys only)
+        if is_buy and qty * order.price > self.cash_balance:
+            _log_failure(self._rejects, "Order value exceeds cash balance %s", self.cash_balance)
             return False
 
-        # Total buy/sell limits (per symbol, cumulative)
-        if order.side == "BUY":
-            current_buy = self.buy_totals.get(order.symbol, 0)
-            if current_buy + order.qty > self.max_total_buy:
-                Logger().log(
-                    "OrderFailed",
-                    {"reason": f"Order exceeds max total buy {self.max_total_buy} for {order.symbol}"}
-                )
-                return False
-        else:
-            current_sell = self.sell_totals.get(order.symbol, 0)
-            if current_sell + order.qty > self.max_total_sell:
-                Logger().log(
-                    "OrderFailed",
-                    {"reason": f"Order exceeds max total sell {self.max_total_sell} for {order.symbol}"}
-                )
+        shard = self._shard(order.symbol)
+        with shard.lock:
+            # Total buy/sell limits (per symbol, cumulative)
+            if is_buy:
+                if shard.buy_total + qty > self.max_total_buy:
+                    _log_failure(self._rejects, "Order exceeds max total buy %s for %s", self.max_total_buy, order.symbol)
+                    return False
+            elif shard.sell_total + qty > self.max_total_sell:
+                _log_failure(self._rejects, "Order exceeds max total sell %s for %s", self.max_total_sell, order.symbol)
                 return False
 
-        # Cash constraint (buys only)
-        if order.side == "BUY" and order.qty * order.price > self.cash_balance:
-            Logger().log(
-                "OrderFailed",
-                {"reason": f"Order value exceeds cash balance {self.cash_balance}"}
-            )
-            return False
+            # Net position constraint
+            current_pos = shard.net
+            prospective_pos = current_pos + sign * qty
+            if abs(prospective_pos) > self.max_position:
+                _log_failure(self._rejects, "Order would exceed max position %s (current %s)", self.max_position, current_pos)
+                return False
 
         return True
 
@@ -183,14 +232,65 @@ class RiskEngineSim:
         if qty <= 0:
             return
 
-        # Update positions storage
-        self.positions.setdefault(order.symbol, []).append(
-            Order(side=order.side, symbol=order.symbol, qty=qty, price=order.price, ts=order.ts, id=order.id)
-        )
-
-        if order.side == "BUY":
-            self.buy_totals[order.symbol] = self.buy_totals.get(order.symbol, 0) + qty
-            self.cash_balance -= qty * order.price
-        else:
-            self.sell_totals[order.symbol] = self.sell_totals.get(order.symbol, 0) + qty
-            self.cash_balance += qty * order.price
+        sign = order.sign
+        shard = self._shard(order.symbol)
+        with shard.lock:
+            # Update positions storage
+            shard.orders.append(
+                Order(side=order.side, symbol=order.symbol, qty=qty, price=order.price, ts=order.ts, id=order.id)
+            )
+            shard.net += sign * qty
+            if sign > 0:
+                shard.buy_total += qty
+            else:
+                shard.sell_total += qty
+
+        # Cash is shared by every symbol; buys spend it, sells add to it
+        with self._cash_lock:
+            self.cash_balance -= sign * qty * order.price
+
+
+# One shared engine per class per process: (settings, engine), built on first use
+_shared_engines: Dict[type, Tuple[Dict[str, Any], Any]] = {}
+_shared_engines_lock = Lock()
+
+
+def _shared_engine(cls, settings: Dict[str, Any]):
+    """
+    Return the process-wide cls engine, building it from settings on the first call.
+    Later calls are a dict read with no lock; asking for different settings raises
+    instead of silently swapping in a fresh engine with empty positions.
+    """
+    held = _shared_engines.get(cls)
+    if held is None:
+        with _shared_engines_lock:
+            held = _shared_engines.get(cls)
+            if held is None:
+                held = _shared_engines[cls] = (settings, cls(**settings))
+    if held[0] != settings:
+        raise ValueError(f"shared {cls.__name__} already built with {held[0]}, not {settings}")
+    return held[1]
+
+
+def get_risk_engine_live(max_order_value=1000, max_asset_percentage=0.1, cache_ttl=0.25) -> RiskEngineLive:
+    return _shared_engine(RiskEngineLive, {
+        "max_order_value": max_order_value,
+        "max_asset_percentage": max_asset_percentage,
+        "cache_ttl": cache_ttl,
+    })
+
+
+def get_risk_engine_sim(
+    max_order_size=1000,
+    max_position=2000,
+    cash_balance=10000,
+    max_total_buy=None,
+    max_total_sell=None,
+) -> RiskEngineSim:
+    return _shared_engine(RiskEngineSim, {
+        "max_order_size": max_order_size,
+        "max_position": max_position,
+        "cash_balance": cash_balance,
+        "max_total_buy": max_total_buy,
+        "max_total_sell": max_total_sell,
+    })
@@ -8,7 +8,7 @@ class SignalType(Enum):
     HOLD = "HOLD"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Signal:
     timestamp: datetime
     signal: SignalType
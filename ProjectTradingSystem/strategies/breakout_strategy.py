@@ -10,6 +10,10 @@ from strategy import MarketDataPoint, Signal, SignalType
 from strategies.strategy_class import Strategy
 from indicator_engine import IndicatorEngine
 
+# Enum members bound once at import
+_BUY = SignalType.BUY
+_SELL = SignalType.SELL
+
 class BreakoutStrategy(Strategy):
     """
     Strategy for BREAKOUT regime:
@@ -27,23 +31,29 @@ class BreakoutStrategy(Strategy):
         if atr is None:
             return None
 
+        # Read each input once; the ATR threshold is only needed once price leaves the range
+        price = mdp.price
+        if low20 <= price <= high20:
+            return None
+        threshold = engine.atr14_history_mean * 1.3
+
         # ---- Bullish Breakout ----
-        if mdp.price > high20 and engine.atr14 > engine.atr14_history_mean * 1.3:
+        if price > high20 and atr > threshold:
             return Signal(
                 timestamp=mdp.timestamp,
-                signal=SignalType.BUY,
+                signal=_BUY,
                 symbol=mdp.symbol,
-                price = mdp.price,
+                price = price,
                 reason="Bullish breakout: range break + ATR expansion"
             )
 
         # ---- Bearish Breakout ----
-        if mdp.price < low20 and engine.atr14 > engine.atr14_history_mean * 1.3:
+        if price < low20 and atr > threshold:
             return Signal(
                 timestamp=mdp.timestamp,
-                signal=SignalType.SELL,
+                signal=_SELL,
                 symbol=mdp.symbol,
-                price = mdp.price,
+                price = price,
                 reason="Bullish breakout: range break + ATR expansion"
             )
 
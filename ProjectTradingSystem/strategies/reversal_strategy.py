@@ -11,6 +11,9 @@ from strategy import MarketDataPoint, Signal, SignalType
 from strategies.strategy_class import Strategy
 from indicator_engine import IndicatorEngine
 
+# Enum member bound once at import
+_BUY = SignalType.BUY
+
 class ReversalStrategy(Strategy):
     """
     Strategy for REVERSAL regime:
@@ -24,26 +27,28 @@ class ReversalStrategy(Strategy):
         high20 = engine.high_n(20)
         low20 = engine.low_n(20)
 
-        if not ema9 or not ema21 or high20 is None or low20 is None:
+        if ema9 is None or ema21 is None or high20 is None or low20 is None:
             return None
 
+        price = mdp.price
+
         # ---- Bullish Reversal (from bear to bull) ----
-        if prev_ema9 < prev_ema21 and ema9 > ema21 and mdp.price > high20:
+        if prev_ema9 < prev_ema21 and ema9 > ema21 and price > high20:
             return Signal(
                         timestamp=mdp.timestamp,
-                        signal=SignalType.BUY,
+                        signal=_BUY,
                         symbol=mdp.symbol,
-                        price = mdp.price,
+                        price = price,
                         reason="Bullish reversal: EMA cross + swing break"
                     )
 
         # ---- Bearish Reversal (from bull to bear) ----
-        if prev_ema9 > prev_ema21 and ema9 < ema21 and mdp.price < low20:
+        if prev_ema9 > prev_ema21 and ema9 < ema21 and price < low20:
             return Signal(
                         timestamp=mdp.timestamp,
-                        signal=SignalType.BUY,
+                        signal=_BUY,
                         symbol=mdp.symbol,
-                        price = mdp.price,
+                        price = price,
                         reason="Bearish reversal: EMA cross + swing break"
                     )
 
@@ -9,7 +9,7 @@ if ROOT not in sys.path:
 from strategies.breakout_strategy import BreakoutStrategy
 from strategies.trend_strategy import TrendStrategy
 from strategies.reversal_strategy import ReversalStrategy
-from strategy import Signal, SignalType, MarketDataPoint
+from strategy import Signal, MarketDataPoint
 
 class StrategyRouter:
     """
@@ -22,6 +22,28 @@ class StrategyRouter:
         self.trend = TrendStrategy()
         self.reversal = ReversalStrategy()
 
+        # regime -> handler(mdp, engine, prev_ema9, prev_ema21); one dict lookup per bar.
+        # Regime names are interned so the lookup usually matches on identity.
+        self._dispatch = {
+            sys.intern("BREAKOUT"): self._route_breakout,
+            sys.intern("TREND"): self._route_trend,
+            sys.intern("REVERSAL"): self._route_reversal,
+        }
+
+    def _route_breakout(self, mdp, engine, prev_ema9, prev_ema21):
+        return self.breakout.generate_signal(mdp, engine)
+
+    def _route_trend(self, mdp, engine, prev_ema9, prev_ema21):
+        return self.trend.generate_signal(mdp, engine)
+
+    def _route_reversal(self, mdp, engine, prev_ema9, prev_ema21):
+        return self.reversal.generate_signal(
+            mdp=mdp,
+            engine=engine,
+            prev_ema9=prev_ema9,
+            prev_ema21=prev_ema21,
+        )
+
     def route(
         self,
         regime: str,
@@ -31,22 +53,10 @@ class StrategyRouter:
         prev_ema21: float
     ) -> Signal:
 
-        # --- BREAKOUT REGIME ---
-        if regime == "BREAKOUT":
-            return self.breakout.generate_signal(mdp, engine)
-
-        # --- TREND REGIME ---
-        if regime == "TREND":
-            return self.trend.generate_signal(mdp, engine)
-
-        # --- REVERSAL REGIME ---
-        if regime == "REVERSAL":
-            return self.reversal.generate_signal(
-                mdp=mdp,
-                engine=engine,
-                prev_ema9=prev_ema9,
-                prev_ema21=prev_ema21,
-            )
+        handler = self._dispatch.get(regime)
 
         # --- NEUTRAL / UNKNOWN ---
-        return None
+        if handler is None:
+            return None
+
+        return handler(mdp, engine, prev_ema9, prev_ema21)
@@ -21,7 +21,7 @@ class TrendStrategy(Strategy):
         ema21 = engine.ema21
         ema50 = engine.ema50
 
-        if not ema9 or not ema21 or not ema50:
+        if ema9 is None or ema21 is None or ema50 is None:
             return None
 
         # ---- Bull Trend ----
@@ -1,29 +1,60 @@
 # strategy.py
-from collections import deque
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime, timedelta
-from typing import Optional, Deque, List, Callable, Dict
+from typing import Optional, List, Callable, Dict, Iterator, Sequence, Tuple
+import math
 import numpy as np
 
+from numba_compat import njit, NUMBA_AVAILABLE
+
 
 class SignalType(Enum):
     BUY = "BUY"
     SELL = "SELL"
     HOLD = "HOLD"
 
-@dataclass(frozen=True)
+@dataclass(slots=True, frozen=True)
 class MarketDataPoint:
     # create timestamp, symbol, and price instances with established types
     timestamp: datetime
     symbol: str
     price: float
 
+    def __post_init__(self):
+        # Coerce once here (ints, numpy scalars) so strategies can use .price as-is
+        if type(self.price) is not float:
+            object.__setattr__(self, "price", float(self.price))
+
     def __str__(self):
         return f"timestamp: {self.timestamp}, symbol: {self.symbol}, price: {self.price}"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class MarketDataBatch:
+    """
+    One symbol's bars as columns instead of a MarketDataPoint per bar.
+    prices is float64 so it feeds the batch kernels without a copy.
+    """
+    timestamps: List[datetime]
+    symbol: str
+    prices: np.ndarray
+
+    @classmethod
+    def from_points(cls, symbol: str, points: Sequence[MarketDataPoint]) -> "MarketDataBatch":
+        return cls([p.timestamp for p in points], symbol, np.array([p.price for p in points], dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def points(self) -> Iterator[MarketDataPoint]:
+        """The bars as MarketDataPoints, built on demand (for on_new_bar)."""
+        symbol = self.symbol
+        for timestamp, price in zip(self.timestamps, self.prices.tolist()):
+            yield MarketDataPoint(timestamp, symbol, price)
+
+
+@dataclass(slots=True, frozen=True)
 class Signal:
     timestamp: datetime
     signal: SignalType
@@ -32,8 +63,414 @@ class Signal:
     reason: str
 
 
+# ----------------- Rolling-window kernels -----------------
+# Numeric cores of the streaming strategies. Each window is a preallocated
+# ring buffer (float64, or float32 via price_dtype to halve the footprint of long
+# windows; its ~7 significant digits still resolve a cent on prices up to ~$100k):
+# `head` is the next slot to write, `count` how many slots are filled. Running
+# sums stay float64 and add the value as stored, so evictions cancel exactly.
+# The kernels return the updated scalars; signal logic stays in Python.
+
+# _momentum_update flags
+_MOM_ABOVE = 1      # momentum > threshold
+_MOM_COLLAPSED = 2  # momentum < -threshold
+
+# MAStrategy state slots: running sums, bars seen (capped at long_w), last short>long relation (-1 = unset)
+_MA_LONG_SUM, _MA_SHORT_SUM, _MA_COUNT, _MA_PREV_REL = range(4)
+# Signal code by (prev_rel << 2) | (curr_rel << 1) | position: BUY on 0->1 while flat, SELL on 1->0 while long
+_MA_ACTION = np.array([0, 0, 1, 0, 0, -1, 0, 0], dtype=np.int8)
+
+
+@njit(cache=True)
+def _ma_step(buf, head, state, short_w, long_w, inv_short_w, inv_long_w, position):
+    """
+    Fold the newest ring price into both running sums and the crossover state.
+    Returns (code, short_avg, long_avg) where code is 1 for a BUY, -1 for a SELL
+    and 0 otherwise.
+    """
+    size = buf.shape[0]
+    count = int(state[_MA_COUNT])
+    long_sum = state[_MA_LONG_SUM]
+    short_sum = state[_MA_SHORT_SUM]
+    if count == long_w:
+        long_sum -= buf[(head - 1 - long_w) % size]
+    if count >= short_w:
+        short_sum -= buf[(head - 1 - short_w) % size]
+    stored = buf[(head - 1) % size]
+    long_sum += stored
+    short_sum += stored
+    if count < long_w:
+        count += 1
+    state[_MA_LONG_SUM] = long_sum
+    state[_MA_SHORT_SUM] = short_sum
+    state[_MA_COUNT] = count
+
+    # Not enough data yet
+    if count < long_w:
+        return 0, 0.0, 0.0
+
+    short_avg = short_sum * inv_short_w
+    long_avg = long_sum * inv_long_w
+    curr_rel = 1 if short_avg > long_avg else 0
+    prev_rel = int(state[_MA_PREV_REL])
+    state[_MA_PREV_REL] = curr_rel
+
+    # the first full window only initializes the relation
+    if prev_rel < 0:
+        return 0, short_avg, long_avg
+    return int(_MA_ACTION[(prev_rel << 2) | (curr_rel << 1) | position]), short_avg, long_avg
+
+
+@njit(cache=True)
+def _momentum_update(buf, head, count, m_window, price, threshold):
+    """
+    Compare the momentum of price vs the ring price m_window bars back against
+    +/-threshold without dividing: (p - p_n) / p_n > t  <=>  p - p_n > t * p_n for p_n > 0.
+    Returns (count, flags) with flags _MOM_ABOVE | _MOM_COLLAPSED, or -1 until
+    m_window + 1 prices have been seen (or if p_n <= 0).
+    """
+    if count <= m_window:
+        count += 1
+    if count <= m_window:
+        return count, -1
+    price_n = buf[(head - 1 - m_window) % buf.shape[0]]
+    if price_n <= 0.0:
+        return count, -1
+    diff = price - price_n
+    bound = threshold * price_n
+    flags = 0
+    if diff > bound:
+        flags |= _MOM_ABOVE
+    if diff < -bound:
+        flags |= _MOM_COLLAPSED
+    return count, flags
+
+
+@njit(cache=True)
+def _zscore_update(buf, head, window, count, total, total_sq, evictions, shift):
+    """
+    Fold the newest ring price into the running sum / sum of squares of (price - shift)
+    over the last `window` prices. Once per window the shift is moved to the window's
+    oldest price and the sums are rebuilt from the ring, so neither rounding drift nor
+    a price that wandered far from the original shift can cancel the variance away.
+    """
+    size = buf.shape[0]
+    if count == window:
+        old = buf[(head - 1 - window) % size] - shift
+        total -= old
+        total_sq -= old * old
+        evictions += 1
+    x = buf[(head - 1) % size] - shift
+    total += x
+    total_sq += x * x
+    if count < window:
+        count += 1
+
+    if evictions >= window:
+        evictions = 0
+        shift = float(buf[(head - window) % size])
+        total = 0.0
+        total_sq = 0.0
+        for i in range(window):
+            d = buf[(head - window + i) % size] - shift
+            total += d
+            total_sq += d * d
+    return count, total, total_sq, evictions, shift
+
+
+# ----------------- Batch kernels -----------------
+# Whole-history versions of the streaming strategies for backtests. Each runs the
+# same per-bar kernel as on_new_bar from a fresh, flat state and returns only the
+# bars that fire: (idx, side, ...) with side 1 BUY / -1 SELL, plus the values quoted
+# in each signal's reason. Outputs are preallocated at len(prices) and sliced to the
+# event count, so no Python objects are touched inside the scan.
+
+@njit(cache=True)
+def _ma_batch(prices, short_w, long_w):
+    n = prices.shape[0]
+    out_idx = np.empty(n, dtype=np.int64)
+    out_side = np.empty(n, dtype=np.int8)
+    short_avgs = np.empty(n, dtype=np.float64)
+    long_avgs = np.empty(n, dtype=np.float64)
+    size = long_w + 1
+    buf = np.empty(size, dtype=np.float64)
+    head = 0
+    state = np.zeros(4, dtype=np.float64)
+    state[_MA_PREV_REL] = -1.0
+    inv_short_w = 1.0 / short_w
+    inv_long_w = 1.0 / long_w
+    position = 0
+    k = 0
+    for i in range(n):
+        buf[head] = prices[i]
+        head = (head + 1) % size
+        code, short_avg, long_avg = _ma_step(buf, head, state, short_w, long_w, inv_short_w, inv_long_w, position)
+        if code != 0:
+            out_idx[k] = i
+            out_side[k] = code
+            short_avgs[k] = short_avg
+            long_avgs[k] = long_avg
+            k += 1
+            position = 1 if code > 0 else 0
+    return out_idx[:k], out_side[:k], short_avgs[:k], long_avgs[:k]
+
+
+@njit(cache=True)
+def _momentum_batch(prices, m_window, threshold):
+    n = prices.shape[0]
+    out_idx = np.empty(n, dtype=np.int64)
+    out_side = np.empty(n, dtype=np.int8)
+    moms = np.empty(n, dtype=np.float64)
+    size = m_window + 1
+    buf = np.empty(size, dtype=np.float64)
+    head = 0
+    count = 0
+    position = 0
+    prev_above = -1  # -1 until the first momentum reading
+    k = 0
+    for i in range(n):
+        buf[head] = prices[i]
+        head = (head + 1) % size
+        count, flags = _momentum_update(buf, head, count, m_window, prices[i], threshold)
+        if flags < 0:
+            continue
+        curr_above = flags & _MOM_ABOVE
+        if prev_above < 0:
+            prev_above = curr_above
+            continue
+        side = 0
+        if prev_above == 0 and curr_above != 0 and position == 0:
+            side = 1
+            position = 1
+        elif flags & _MOM_COLLAPSED and position == 1:
+            side = -1
+            position = 0
+        if side != 0:
+            price_n = buf[(head - 1 - m_window) % size]
+            out_idx[k] = i
+            out_side[k] = side
+            moms[k] = (prices[i] - price_n) / price_n
+            k += 1
+        prev_above = curr_above
+    return out_idx[:k], out_side[:k], moms[:k]
+
+
+def _momentum_batch_numpy(prices, m_window, threshold):
+    """
+    NumPy version of _momentum_batch with the same outputs, for when numba is not
+    installed and the kernel would run as a plain Python loop over every bar. The
+    momentum tests are whole-array operations on shifted views of prices; only the
+    bars where one fires are walked in Python to apply the position state.
+    """
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64))
+    if prices.shape[0] <= m_window:
+        return empty
+    # bars with a reading: m_window bars of history and a positive reference price
+    bars = np.flatnonzero(prices[:-m_window] > 0.0) + m_window
+    curr = prices[bars]
+    price_n = prices[bars - m_window]
+    # same cross-multiplied tests as _momentum_update
+    diff = curr - price_n
+    bound = threshold * price_n
+    above = diff > bound
+    collapsed = diff < -bound
+    # a BUY needs the previous reading at or below the threshold
+    surged = np.zeros(bars.shape[0], dtype=bool)
+    surged[1:] = above[1:] & ~above[:-1]
+
+    events = []
+    sides = []
+    position = 0
+    for k in np.flatnonzero(surged | collapsed).tolist():
+        if position == 0 and surged[k]:
+            position = 1
+        elif position == 1 and collapsed[k]:
+            position = 0
+        else:
+            continue
+        events.append(k)
+        sides.append(1 if position else -1)
+    if not events:
+        return empty
+    events = np.array(events, dtype=np.int64)
+    return bars[events], np.array(sides, dtype=np.int8), diff[events] / price_n[events]
+
+
+# whole-history momentum scan: the compiled kernel, or the vectorized version without numba
+_momentum_events = _momentum_batch if NUMBA_AVAILABLE else _momentum_batch_numpy
+
+
+@njit(cache=True)
+def _zscore_batch(prices, window, threshold):
+    n = prices.shape[0]
+    out_idx = np.empty(n, dtype=np.int64)
+    out_side = np.empty(n, dtype=np.int8)
+    zs = np.empty(n, dtype=np.float64)
+    prev_zs = np.zeros(n, dtype=np.float64)  # only set on exits
+    if n == 0:
+        return out_idx, out_side, zs, prev_zs
+    size = window + 1
+    buf = np.empty(size, dtype=np.float64)
+    shift = float(prices[0])
+    head = 0
+    count = 0
+    total = 0.0
+    total_sq = 0.0
+    evictions = 0
+    position = 0
+    k = 0
+    for i in range(n):
+        price = prices[i]
+        buf[head] = price
+        head = (head + 1) % size
+        count, total, total_sq, evictions, shift = _zscore_update(
+            buf, head, window, count, total, total_sq, evictions, shift
+        )
+        if count < window:
+            continue
+        shifted_mean = total / count
+        var = total_sq / count - shifted_mean * shifted_mean
+        if var <= 1e-12:
+            continue
+        mean = shifted_mean + shift
+        std = math.sqrt(var)
+        z = (price - mean) / std
+        if position == 0:
+            if z < -threshold:
+                out_idx[k] = i
+                out_side[k] = 1
+                zs[k] = z
+                k += 1
+                position = 1
+        elif z >= 0:
+            # prev_z < 0 <=> previous price below the window mean (std > 0)
+            prev_price = buf[(head - 2) % size]
+            if prev_price < mean:
+                out_idx[k] = i
+                out_side[k] = -1
+                zs[k] = z
+                prev_zs[k] = (prev_price - mean) / std
+                k += 1
+                position = 0
+    return out_idx[:k], out_side[:k], zs[:k], prev_zs[:k]
+
+
+def ensure_compiled():
+    """
+    Compile the strategy kernels now instead of on the first bar. Runs each kernel
+    once on dummy data for both ring dtypes; with numba's on-disk cache this is a
+    cache load after the first run. A no-op cost when numba is not installed.
+    """
+    prices = np.linspace(100.0, 101.0, 8)
+    for dtype in (np.float64, np.float32):
+        buf = prices[:4].astype(dtype)
+        state = np.zeros(4, dtype=np.float64)
+        _ma_step(buf, 0, state, 1, 2, 1.0, 0.5, 0)
+        _momentum_update(buf, 0, 0, 2, 100.0, 0.001)
+        _zscore_update(buf, 0, 2, 0, 0.0, 0.0, 0, 100.0)
+    _ma_batch(prices, 2, 3)
+    _momentum_batch(prices, 2, 0.001)
+    _zscore_batch(prices, 3, 1.0)
+
+
+# ----------------- Shared price history -----------------
+class PriceRing:
+    """
+    Fixed-capacity ring of recent prices. Each streaming strategy reads its window
+    out of one; strategies run side by side on the same symbol can share a single
+    ring so each bar's price is written once instead of once per strategy.
+
+    A bar is pushed the first time any strategy sees its MarketDataPoint; the other
+    strategies get the same object and skip the write. Every strategy on a shared
+    ring must be fed every bar, and the capacity must exceed the longest window.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        if capacity < 2:
+            raise ValueError("capacity must be >= 2")
+        self.capacity = capacity
+        self.buf = np.empty(capacity, dtype=dtype)
+        self.head = 0  # next slot to write; the newest price is at head - 1
+        self._last_point = None
+
+    def push(self, data_point: MarketDataPoint):
+        """Write the bar's price unless this exact data point was already pushed."""
+        if data_point is self._last_point:
+            return
+        self._last_point = data_point
+        self.buf[self.head] = data_point.price
+        self.head = (self.head + 1) % self.capacity
+
+    def ago(self, k: int) -> float:
+        """k-th newest price (0 = latest)."""
+        return float(self.buf[(self.head - 1 - k) % self.capacity])
+
+
+def _ring_for(history: Optional[PriceRing], window: int, price_dtype) -> PriceRing:
+    """The shared ring if one was passed (checked against window), else a private one."""
+    if history is None:
+        return PriceRing(window + 1, price_dtype)
+    if history.capacity <= window:
+        raise ValueError(f"shared PriceRing capacity {history.capacity} must exceed window {window}")
+    return history
+
+
+# ----------------- Batch entry points -----------------
+class _BatchSignalStrategy:
+    """
+    Whole-history entry points shared by the streaming strategies. A subclass
+    provides _batch_events(prices), its batch kernel's (idx, side, *reason values)
+    arrays, and _reason(buy, *values), the signal reason also used by on_new_bar.
+    """
+
+    def run_batch(self, prices) -> np.ndarray:
+        """
+        Signal codes for a whole price history in one call (1 BUY, -1 SELL, 0 none).
+        Starts from a fresh, flat state; the streaming state is left untouched.
+        """
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        idx, side = self._batch_events(prices)[:2]
+        codes = np.zeros(len(prices), dtype=np.int8)
+        codes[idx] = side
+        return codes
+
+    def on_bars(self, batch: MarketDataBatch) -> List[Tuple[int, Signal]]:
+        """
+        (bar index, signal) pairs for a MarketDataBatch, in bar order; same fresh-state
+        semantics as generate_signals. The index tells bars with equal timestamp and
+        price apart.
+        """
+        return self._indexed_signals(batch.timestamps, batch.prices)
+
+    def generate_signals(self, timestamps: Sequence[datetime], prices) -> List[Signal]:
+        """
+        Signals for a whole price history (e.g. a DataFrame's index and Close column).
+        The batch kernel finds the bars that fire; Signal objects and their reasons are
+        only built for those.
+        Starts from a fresh, flat state; the streaming state and self.signals are left untouched.
+        """
+        return [signal for _, signal in self._indexed_signals(timestamps, prices)]
+
+    def _indexed_signals(self, timestamps: Sequence[datetime], prices) -> List[Tuple[int, Signal]]:
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        if len(timestamps) != len(prices):
+            raise ValueError("timestamps and prices must have the same length")
+        idx, side, *values = self._batch_events(prices)
+
+        # one comprehension over the (sparse) events, with the per-signal lookups hoisted
+        symbol = self.symbol
+        reason = self._reason
+        buy_type, sell_type = SignalType.BUY, SignalType.SELL
+        return [
+            (i, Signal(timestamps[i], buy_type if buy else sell_type, symbol, price, reason(buy, *reason_values)))
+            for i, price, buy, *reason_values in zip(
+                idx.tolist(), prices[idx].tolist(), (side > 0).tolist(), *(v.tolist() for v in values)
+            )
+        ]
+
+
 # ----------------- MA Crossover (streaming) -----------------
-class MAStrategy:
+class MAStrategy(_BatchSignalStrategy):
     """
     Streaming moving-average crossover.
     Use on_new_bar(...) for each incoming bar.
@@ -41,110 +478,111 @@ class MAStrategy:
     a SELL on a crossover from short>=long to short<long.
     """
 
-    def __init__(self, symbol: str, short_window: int = 20, long_window: int = 50):
+    def __init__(self, symbol: str, short_window: int = 20, long_window: int = 50, record_history: bool = True,
+                 price_dtype=np.float64, history: Optional[PriceRing] = None):
         if short_window >= long_window:
             raise ValueError("short_window must be < long_window")
         self.symbol = symbol
         self.short_w = short_window
         self.long_w = long_window
+        # multiply by reciprocals instead of dividing every bar
+        self._inv_short_w = 1.0 / short_window
+        self._inv_long_w = 1.0 / long_window
 
-        # rolling buffers
-        self._dq_long: Deque[float] = deque(maxlen=self.long_w)
-        self._dq_short: Deque[float] = deque(maxlen=self.short_w)
-        self._long_sum = 0.0
-        self._short_sum = 0.0
+        # price ring (private unless shared); both windows are its newest slots
+        self._ring = _ring_for(history, self.long_w, price_dtype)
+        # kernel state, indexed by the _MA_* slots
+        self._state = np.zeros(4, dtype=np.float64)
+        self._state[_MA_PREV_REL] = -1.0
 
         # state
         self.position = 0  # 0 flat, 1 long
-        self._prev_short_gt_long: Optional[bool] = None
 
         # history (optional)
+        self.record_history = record_history
         self.signals: List[Signal] = []
 
-    def on_new_bar(self, data_point: MarketDataPoint) -> Optional[Signal]:
-        price = float(data_point.price)
-        timestamp = data_point.timestamp
+    def _batch_events(self, prices: np.ndarray):
+        return _ma_batch(prices, self.short_w, self.long_w)
 
-        # update long window
-        if len(self._dq_long) == self.long_w:
-            # deque full: subtract oldest from sum (popleft will happen automatically by deque maxlen, so we pop manually)
-            oldest = self._dq_long.popleft()
-            self._long_sum -= oldest
-        self._dq_long.append(price)
-        self._long_sum += price
-
-        # update short window
-        if len(self._dq_short) == self.short_w:
-            oldest_s = self._dq_short.popleft()
-            self._short_sum -= oldest_s
-        self._dq_short.append(price)
-        self._short_sum += price
-
-        # Not enough data yet
-        if len(self._dq_long) < self.long_w or len(self._dq_short) < self.short_w:
-            return None
+    def _reason(self, buy: bool, short_avg: float, long_avg: float) -> str:
+        return f"short_ma {short_avg:.6f} crossed {'above' if buy else 'below'} long_ma {long_avg:.6f}"
 
-        short_avg = self._short_sum / self.short_w
-        long_avg = self._long_sum / self.long_w
-        curr_rel = short_avg > long_avg
+    def on_new_bar(self, data_point: MarketDataPoint) -> Optional[Signal]:
+        price = data_point.price
+        timestamp = data_point.timestamp
 
-        # initialize prev relation on first full-bar observation
-        if self._prev_short_gt_long is None:
-            self._prev_short_gt_long = curr_rel
+        ring = self._ring
+        ring.push(data_point)
+        # sums and crossover state are updated inside the kernel
+        code, short_avg, long_avg = _ma_step(
+            ring.buf, ring.head, self._state, self.short_w, self.long_w,
+            self._inv_short_w, self._inv_long_w, self.position
+        )
+        if code == 0:
             return None
 
-        signal = None
-        # crossing logic
-        if (not self._prev_short_gt_long) and curr_rel and self.position == 0:
-            signal = Signal(timestamp, SignalType.BUY, self.symbol, price, f"short_ma {short_avg:.6f} crossed above long_ma {long_avg:.6f}")
+        if code > 0:
+            signal = Signal(timestamp, SignalType.BUY, self.symbol, price, self._reason(True, short_avg, long_avg))
             self.position = 1
-        elif self._prev_short_gt_long and (not curr_rel) and self.position == 1:
-            signal = Signal(timestamp, SignalType.SELL, self.symbol, price, f"short_ma {short_avg:.6f} crossed below long_ma {long_avg:.6f}")
+        else:
+            signal = Signal(timestamp, SignalType.SELL, self.symbol, price, self._reason(False, short_avg, long_avg))
             self.position = 0
 
-        self._prev_short_gt_long = curr_rel
-
-        if signal:
+        if self.record_history:
             self.signals.append(signal)
         return signal
 
 
 # ----------------- Momentum Strategy (streaming ROC) -----------------
-class MomentumStrategy:
+class MomentumStrategy(_BatchSignalStrategy):
     """
     Streaming Rate-of-Change momentum strategy.
     Emits BUY when momentum (price - price_n)/price_n crosses above threshold from below,
     emits SELL when momentum crosses below -threshold while in position.
     """
 
-    def __init__(self, symbol: str, momentum_window: int = 10, momentum_threshold: float = 0.001):
+    def __init__(self, symbol: str, momentum_window: int = 10, momentum_threshold: float = 0.001, record_history: bool = True,
+                 price_dtype=np.float64, history: Optional[PriceRing] = None):
         if momentum_window < 1:
             raise ValueError("momentum_window must be >= 1")
         self.symbol = symbol
         self.m_window = momentum_window
         self.threshold = momentum_threshold
 
-        self._dq: Deque[float] = deque(maxlen=self.m_window + 1)  # need price_n and current
+        # need price_n (m_window bars back) and current from the ring
+        self._ring = _ring_for(history, self.m_window, price_dtype)
+        self._count = 0  # bars seen, capped at m_window + 1
         self.position = 0
+        self.record_history = record_history
         self.signals: List[Signal] = []
         self._prev_momentum_above = None  # track previous relation (bool or None)
 
-    def on_new_bar(self, data_point: MarketDataPoint) -> Optional[Signal]:
-        price = float(data_point.price)
-        timestamp = data_point.timestamp
-        self._dq.append(price)
+    def _batch_events(self, prices: np.ndarray):
+        return _momentum_events(prices, self.m_window, float(self.threshold))
 
-        # need at least m_window + 1 prices to compute momentum
-        if len(self._dq) <= self.m_window:
-            return None
+    def _reason(self, buy: bool, momentum: float) -> str:
+        if buy:
+            return f"Momentum surged to {momentum:.6f} (> {self.threshold})"
+        return f"Momentum collapsed to {momentum:.6f} (< -{self.threshold})"
+
+    def _momentum(self, price: float) -> float:
+        """Momentum of price vs the price m_window bars back; only computed for signal reasons."""
+        price_n = self._ring.ago(self.m_window)
+        return (price - price_n) / price_n
 
-        # momentum = (price_now - price_n) / price_n
-        price_n = self._dq[0]
-        if price_n == 0:
+    def on_new_bar(self, data_point: MarketDataPoint) -> Optional[Signal]:
+        price = data_point.price
+        timestamp = data_point.timestamp
+        # momentum = (price_now - price_n) / price_n, compared against the threshold in the
+        # kernel; no reading until m_window + 1 prices (or if price_n is not positive)
+        ring = self._ring
+        ring.push(data_point)
+        self._count, flags = _momentum_update(ring.buf, ring.head, self._count, self.m_window, price, self.threshold)
+        if flags < 0:
             return None
-        momentum = (price - price_n) / price_n
 
-        curr_above = momentum > self.threshold
+        curr_above = bool(flags & _MOM_ABOVE)
 
         # initialize
         if self._prev_momentum_above is None:
@@ -154,85 +592,114 @@ class MomentumStrategy:
 
         signal = None
         if (not self._prev_momentum_above) and curr_above and self.position == 0:
-            signal = Signal(timestamp, SignalType.BUY, self.symbol, price, f"Momentum surged to {momentum:.6f} (> {self.threshold})")
+            signal = Signal(timestamp, SignalType.BUY, self.symbol, price, self._reason(True, self._momentum(price)))
             self.position = 1
-        elif momentum < -self.threshold and self.position == 1:
-            signal = Signal(timestamp, SignalType.SELL, self.symbol, price, f"Momentum collapsed to {momentum:.6f} (< -{self.threshold})")
+        elif flags & _MOM_COLLAPSED and self.position == 1:
+            signal = Signal(timestamp, SignalType.SELL, self.symbol, price, self._reason(False, self._momentum(price)))
             self.position = 0
 
         self._prev_momentum_above = curr_above
 
-        if signal:
+        if signal and self.record_history:
             self.signals.append(signal)
         return signal
 
 
 # ----------------- Statistical Z-Score Mean Reversion (streaming) -----------------
-class StatisticalSignalStrategy:
+class StatisticalSignalStrategy(_BatchSignalStrategy):
     """
     Streaming Z-Score mean-reversion. Uses a lookback window (number of bars).
     BUY when current z-score < -zscore_threshold (oversold) and flat.
     SELL when z-score crosses zero while in a long position.
     """
 
-    def __init__(self, symbol: str, lookback_window: int = 20, zscore_threshold: float = 1.5):
+    def __init__(self, symbol: str, lookback_window: int = 20, zscore_threshold: float = 1.5, record_history: bool = True,
+                 price_dtype=np.float64, history: Optional[PriceRing] = None):
         if lookback_window < 2:
             raise ValueError("lookback_window must be >= 2")
         self.symbol = symbol
         self.window = lookback_window
         self.threshold = zscore_threshold
+        self._neg_threshold = -zscore_threshold
 
-        self._dq: Deque[float] = deque(maxlen=self.window)
+        self._ring = _ring_for(history, self.window, price_dtype)
+        self._count = 0  # bars seen, capped at window
         self.position = 0
+        self.record_history = record_history
         self.signals: List[Signal] = []
         self._entry_zscore = None
 
-    def _compute_zscore(self, price: float):
-        arr = np.array(self._dq)
-        mean = arr.mean()
-        std = arr.std(ddof=0)
-        if std == 0:
-            return None
-        return (price - mean) / std
+        # running sum / sum of squares of (price - shift); shifting by a recent price
+        # (the first, then re-centred once per window) keeps sumsq/n - mean^2 from
+        # cancelling away at price ~ 100s
+        self._shift: Optional[float] = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._evictions = 0
+
+    def _push(self, data_point: MarketDataPoint, price: float):
+        if self._shift is None:
+            self._shift = price
+        ring = self._ring
+        ring.push(data_point)
+        self._count, self._sum, self._sumsq, self._evictions, self._shift = _zscore_update(
+            ring.buf, ring.head, self.window, self._count, self._sum, self._sumsq, self._evictions, self._shift
+        )
+
+    def _batch_events(self, prices: np.ndarray):
+        return _zscore_batch(prices, self.window, float(self.threshold))
+
+    def _reason(self, buy: bool, z: float, prev_z: float) -> str:
+        # prev_z is only meaningful on exits
+        if buy:
+            return f"Oversold z={z:.6f} < -{self.threshold}"
+        return f"Mean reversion z crossed zero: prev {prev_z:.6f} -> curr {z:.6f}"
 
     def on_new_bar(self, data_point: MarketDataPoint) -> Optional[Signal]:
-        price = float(data_point.price)
+        price = data_point.price
         timestamp = data_point.timestamp
-        self._dq.append(price)
+        self._push(data_point, price)
 
-        if len(self._dq) < self.window:
+        if self._count < self.window:
             return None
 
-        z = self._compute_zscore(price)
-        if z is None:
+        # window mean/std straight from the running sums (population std, ddof=0)
+        n = self._count
+        shifted_mean = self._sum / n
+        var = self._sumsq / n - shifted_mean * shifted_mean
+        # near-zero variance is a flat window
+        if var <= 1e-12:
             return None
+        mean = shifted_mean + self._shift
+        std = math.sqrt(var)
+        z = (price - mean) / std
 
         signal = None
         # entry: oversold
-        if self.position == 0 and z < -self.threshold:
+        if self.position == 0 and z < self._neg_threshold:
             self._entry_zscore = z
-            signal = Signal(timestamp, SignalType.BUY, self.symbol, price, f"Oversold z={z:.6f} < -{self.threshold}")
+            signal = Signal(timestamp, SignalType.BUY, self.symbol, price, self._reason(True, z, 0.0))
             self.position = 1
 
         # exit (long): z crosses zero from below to >= 0
-        elif self.position == 1:
-            # compute previous zscore using previous price if available
-            # We can approximate by recomputing z-score for previous price (second to last in deque)
-            if len(self._dq) >= 2:
-                prev_price = list(self._dq)[-2]
-                prev_z = self._compute_zscore(prev_price)
-            else:
-                prev_z = None
-
-            if prev_z is not None and prev_z < 0 and z >= 0:
-                signal = Signal(timestamp, SignalType.SELL, self.symbol, price, f"Mean reversion z crossed zero: prev {prev_z:.6f} -> curr {z:.6f}")
+        elif self.position == 1 and z >= 0:
+            # z-score of the previous price (second newest in the ring) against the
+            # current window; std > 0, so prev_z < 0 is just prev_price < mean
+            prev_price = self._ring.ago(1)
+            if prev_price < mean:
+                prev_z = (prev_price - mean) / std
+                signal = Signal(timestamp, SignalType.SELL, self.symbol, price, self._reason(False, z, prev_z))
                 self.position = 0
                 self._entry_zscore = None
 
-        if signal:
+        if signal and self.record_history:
             self.signals.append(signal)
         return signal
 
+# SentimentStrategy minute key of 1970-01-01 00:00, the datetime64 epoch
+_EPOCH_MINUTE_KEY = datetime(1970, 1, 1).toordinal() * 1440
+
+
 class SentimentStrategy:
     """
     Streaming sentiment-driven strategy that fuses price bars with external news or
@@ -248,6 +715,7 @@ class SentimentStrategy:
         positive_threshold: float = 0.3,
         negative_threshold: float = -0.3,
         cooldown_bars: int = 3,
+        record_history: bool = True,
     ):
         """
         Initialize the sentiment strategy with thresholds and an optional external sentiment provider.
@@ -261,6 +729,8 @@ class SentimentStrategy:
             positive_threshold (float): Trigger level to enter long positions.
             negative_threshold (float): Trigger level to exit longs / go flat.
             cooldown_bars (int): Minimum number of bars between trades to avoid over-trading.
+            record_history (bool): Keep emitted signals in self.signals; turn off for long runs
+                that only consume the return value of on_new_bar.
             position_size (int): Quantity per order.
         """
         if cooldown_bars < 1:
@@ -271,13 +741,25 @@ class SentimentStrategy:
         self.negative_threshold = negative_threshold
         self.cooldown_bars = cooldown_bars
         self.position = 0
+        self.record_history = record_history
         self.signals: List[Signal] = []
 
-        self._sentiment_scores = sentiment_scores or {}
+        # Scores are stored under integer minute keys (see _format_key)
+        self._sentiment_scores: Dict[int, float] = {}
+        for key, score in (sentiment_scores or {}).items():
+            minute = self._parse_key(key)
+            if minute is not None:
+                self._sentiment_scores[minute] = float(score)
         self._external_lookup = sentiment_lookup
+        self._use_external = sentiment_lookup is not None
         self._bars_since_trade = cooldown_bars
 
-    def _format_key(self, timestamp: datetime) -> str:
+        # Dense per-minute scores from prebuild_sentiment_array; None until built
+        self._sent_by_minute: Optional[List[float]] = None
+        self._sent_start_minute = 0
+
+    @staticmethod
+    def _format_key(timestamp: datetime) -> int:
         """
         Normalize timestamps into keys compatible with stored sentiment scores.
 
@@ -285,9 +767,30 @@ class SentimentStrategy:
             timestamp (datetime): The event timestamp to normalize.
 
         Returns:
-            str: Compact representation used inside sentiment score dictionaries.
+            int: Minutes since 0001-01-01 of the timestamp's wall-clock time (tz offset ignored).
         """
-        return timestamp.strftime("%Y-%m-%d %H:%M")
+        return timestamp.toordinal() * 1440 + timestamp.hour * 60 + timestamp.minute
+
+    @classmethod
+    def _parse_key(cls, key) -> Optional[int]:
+        """
+        Convert a user-supplied sentiment key into a minute key.
+
+        Args:
+            key (Union[str, datetime, int]): ISO-like "YYYY-MM-DD HH:MM" / "YYYY-MM-DDTHH:MM[+offset]"
+                string, datetime, or an already computed minute key.
+
+        Returns:
+            Optional[int]: Minute key, or None when the string cannot be parsed.
+        """
+        if isinstance(key, datetime):
+            return cls._format_key(key)
+        if isinstance(key, int):
+            return key
+        try:
+            return cls._format_key(datetime.fromisoformat(str(key).strip()))
+        except ValueError:
+            return None
 
     def _default_sentiment_lookup(self, timestamp: datetime, symbol: str) -> float:
         """
@@ -302,10 +805,42 @@ class SentimentStrategy:
         """
         if symbol != self.symbol:
             return 0.0
-        exact_key = timestamp.isoformat(timespec="minutes")
-        if exact_key in self._sentiment_scores:
-            return float(self._sentiment_scores[exact_key])
-        return float(self._sentiment_scores.get(self._format_key(timestamp), 0.0))
+        minute = self._format_key(timestamp)
+        dense = self._sent_by_minute
+        if dense is not None:
+            idx = minute - self._sent_start_minute
+            if 0 <= idx < len(dense):
+                return dense[idx]
+        return self._sentiment_scores.get(minute, 0.0)
+
+    def prebuild_sentiment_array(self, start_ts: datetime, end_ts: datetime) -> np.ndarray:
+        """
+        Resolve the stored scores for every minute in [start_ts, end_ts] up front, so a
+        historical run indexes by minute offset instead of probing the score dict each bar.
+        Minutes outside the range keep using the dict.
+
+        Args:
+            start_ts (datetime): First bar timestamp of the run.
+            end_ts (datetime): Last bar timestamp of the run.
+
+        Returns:
+            np.ndarray: float64 score per minute (0.0 where there is no reading), starting at start_ts.
+        """
+        start = self._format_key(start_ts)
+        n_minutes = self._format_key(end_ts) - start + 1
+        if n_minutes <= 0:
+            raise ValueError("end_ts must not be before start_ts")
+
+        scores = np.zeros(n_minutes, dtype=np.float64)
+        for minute, score in self._sentiment_scores.items():
+            idx = minute - start
+            if 0 <= idx < n_minutes:
+                scores[idx] = score
+
+        # Plain floats for the per-bar lookup; indexing a list beats indexing an ndarray from Python
+        self._sent_by_minute = scores.tolist()
+        self._sent_start_minute = start
+        return scores
 
     def update_sentiment(self, timestamp: datetime, score: float):
         """
@@ -315,7 +850,35 @@ class SentimentStrategy:
             timestamp (datetime): When the sentiment applies.
             score (float): Normalized sentiment measure derived from external data.
         """
-        self._sentiment_scores[self._format_key(timestamp)] = float(score)
+        minute = self._format_key(timestamp)
+        self._sentiment_scores[minute] = float(score)
+        # Keep a prebuilt array in step
+        dense = self._sent_by_minute
+        if dense is not None and 0 <= minute - self._sent_start_minute < len(dense):
+            dense[minute - self._sent_start_minute] = float(score)
+
+    def update_sentiment_batch(self, timestamps, scores):
+        """
+        Add or overwrite many sentiment readings at once (e.g. a session's news preload).
+        Minute keys are computed in one vectorized pass instead of per reading.
+
+        Args:
+            timestamps (array-like): Naive timestamps, anything np.asarray(..., "datetime64[m]") accepts.
+            scores (array-like): Normalized sentiment measures, aligned with timestamps.
+        """
+        minutes = np.asarray(timestamps, dtype="datetime64[m]").view(np.int64) + _EPOCH_MINUTE_KEY
+        values = np.asarray(scores, dtype=np.float64)
+        if minutes.shape != values.shape:
+            raise ValueError("timestamps and scores must have the same length")
+        self._sentiment_scores.update(zip(minutes.tolist(), values.tolist()))
+
+        # Keep a prebuilt array in step
+        dense = self._sent_by_minute
+        if dense is not None:
+            idx = minutes - self._sent_start_minute
+            mask = (idx >= 0) & (idx < len(dense))
+            for i, score in zip(idx[mask].tolist(), values[mask].tolist()):
+                dense[i] = score
 
     def _current_sentiment(self, timestamp: datetime) -> float:
         """
@@ -327,8 +890,9 @@ class SentimentStrategy:
         Returns:
             float: Latest sentiment reading.
         """
-        provider = self._external_lookup or self._default_sentiment_lookup
-        return float(provider(timestamp, self.symbol))
+        if self._use_external:
+            return float(self._external_lookup(timestamp, self.symbol))
+        return self._default_sentiment_lookup(timestamp, self.symbol)
 
     def on_new_bar(self, data_point: MarketDataPoint) -> Optional[Signal]:
         """
@@ -353,20 +917,22 @@ class SentimentStrategy:
             and self._bars_since_trade >= self.cooldown_bars
         ):
             reason = f"Sentiment {sentiment:.4f} >= threshold {self.positive_threshold}"
-            signal = Signal(data_point.timestamp, SignalType.BUY, self.symbol, float(data_point.price), reason)
+            signal = Signal(data_point.timestamp, SignalType.BUY, self.symbol, data_point.price, reason)
             self.position = 1
             self._bars_since_trade = 0
         elif self.position == 1 and sentiment <= self.negative_threshold:
             reason = f"Sentiment {sentiment:.4f} <= threshold {self.negative_threshold}"
-            signal = Signal(data_point.timestamp, SignalType.SELL, self.symbol, float(data_point.price), reason)
+            signal = Signal(data_point.timestamp, SignalType.SELL, self.symbol, data_point.price, reason)
             self.position = 0
             self._bars_since_trade = 0
 
-        if signal:
+        if signal and self.record_history:
             self.signals.append(signal)
         return signal
     
 if __name__ == "__main__":
+    ensure_compiled()
+
     # Quick demo to validate MAStrategy generates a buy then a sell signal.
     ma = MAStrategy(symbol="DEMO", short_window=3, long_window=5)
     prices = [105, 104, 103, 102, 101, 102, 103, 104, 103, 102, 101]
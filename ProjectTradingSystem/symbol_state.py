@@ -17,15 +17,13 @@ class SymbolState:
         self.regime_detector = RegimeDetector()
         self.router = StrategyRouter()
 
-        self.prev_ema9 = None
-        self.prev_ema21 = None
         self.current_regime = None
 
     def update_state(self, mdp: MarketDataPoint, timestamp=None):
         """
         Called for each new price for this symbol.
-        Updates indicators, detects regime, routes strategy, and
-        then updates previous indicator values.
+        Updates indicators, detects regime, and routes strategy.
+        The previous bar's EMAs come from the indicator engine.
         """
 
         # STEP 1 — Update Indicators for This Symbol
@@ -64,15 +62,10 @@ class SymbolState:
             regime=regime,
             mdp=mdp,
             engine=self.indicators,
-            prev_ema9=self.prev_ema9,
-            prev_ema21=self.prev_ema21
+            prev_ema9=self.indicators.prev_ema9,
+            prev_ema21=self.indicators.prev_ema21
         )
 
         #log_signal(self.symbol, timestamp, signal)
 
-        # STEP 4 — Store this bar’s EMAs for next bar’s reversal logic
-        self.prev_ema9 = self.indicators.ema9
-        self.prev_ema21 = self.indicators.ema21
-        self.prev_atr14 = self.indicators.atr14
-
         return regime, signal
\ No newline at end of file
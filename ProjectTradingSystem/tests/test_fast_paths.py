@@ -0,0 +1,182 @@
+import csv
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure ProjectTradingSystem modules are importable
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import backtester
+import gateway
+from gateway import AsyncLogSink
+from order import Order
+from order_manager import OrderManager
+from risk_engine import RiskEngineSim
+from strategy import MarketDataBatch, MarketDataPoint, MAStrategy, MomentumStrategy, SignalType, StatisticalSignalStrategy
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    # Audit files and the Logger's events.json are written relative to the cwd
+    monkeypatch.chdir(tmp_path)
+
+
+STRATEGIES = [
+    lambda: MAStrategy("ABC", 5, 13),
+    lambda: MomentumStrategy("ABC", 10, 0.002),
+    lambda: StatisticalSignalStrategy("ABC", 20, 1.5),
+]
+
+
+def _prices(seed, n=1500):
+    prices = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, n))
+    prices[200:260] = prices[200]  # a flat stretch: zero variance, no momentum
+    return prices
+
+
+def _stream_codes(strategy, timestamps, prices):
+    codes = []
+    for ts, price in zip(timestamps, prices.tolist()):
+        sig = strategy.on_new_bar(MarketDataPoint(ts, "ABC", price))
+        codes.append(0 if sig is None else (1 if sig.signal is SignalType.BUY else -1))
+    return codes
+
+
+@pytest.mark.parametrize("make", STRATEGIES)
+def test_batch_kernel_matches_streaming(make):
+    for seed in range(3):
+        prices = _prices(seed)
+        timestamps = [datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(len(prices))]
+        assert make().run_batch(prices).tolist() == _stream_codes(make(), timestamps, prices)
+
+
+@pytest.mark.parametrize("make", STRATEGIES)
+def test_on_bars_indexes_duplicate_bars(make):
+    prices = _prices(5)
+    # Every bar shares one timestamp, and the flat stretch repeats the price too
+    timestamps = [datetime(2024, 1, 1)] * len(prices)
+    expected = [i for i, code in enumerate(_stream_codes(make(), timestamps, prices)) if code]
+
+    indexed = make().on_bars(MarketDataBatch(timestamps, "ABC", prices))
+    assert [i for i, _ in indexed] == expected
+    assert all(sig.price == prices[i] for i, sig in indexed)
+
+
+def _audit_qtys(path):
+    with path.open(newline="") as f:
+        return [row["qty"] for row in csv.DictReader(f)]
+
+
+def test_log_sink_flush_writes_rows_in_order(tmp_path):
+    sink = AsyncLogSink(maxsize=4)
+    paths = [tmp_path / f"audit_{i}.csv" for i in range(AsyncLogSink.MAX_OPEN_FILES + 2)]
+    for qty in range(1, 4):
+        for path in paths:
+            sink.post_order_event(Order(side="BUY", symbol="ABC", qty=qty, price=10.0), "sent", filepath=str(path))
+    assert sink.flush(5)
+    for path in paths:
+        assert _audit_qtys(path) == ["1", "2", "3"]
+    sink.close(5)
+
+
+def test_log_sink_failed_write_still_releases_flush(tmp_path):
+    sink = AsyncLogSink()
+    bad = tmp_path / "is_a_dir"
+    bad.mkdir()
+    good = tmp_path / "audit.csv"
+    sink.post_order_event(Order(side="SELL", symbol="ABC", qty=1, price=10.0), "sent", filepath=str(bad))
+    sink.post_order_event(Order(side="SELL", symbol="ABC", qty=2, price=10.0), "sent", filepath=str(good))
+    assert sink.flush(5)
+    assert _audit_qtys(good) == ["2"]
+    sink.close(5)
+
+
+def test_log_sink_close_writes_pending_rows_and_stops(tmp_path):
+    sink = AsyncLogSink()
+    path = tmp_path / "audit.csv"
+    for qty in range(1, 51):
+        sink.post_order_event(Order(side="BUY", symbol="ABC", qty=qty, price=1.0), "sent", filepath=str(path))
+    sink.close(5)
+    assert not sink._thread.is_alive()
+    assert _audit_qtys(path) == [str(qty) for qty in range(1, 51)]
+    assert not sink._audit_files
+
+
+def _market_csv(tmp_path):
+    csv_path = tmp_path / "market_data.csv"
+    csv_path.write_text("Datetime,Symbol,Close\n")
+    timestamps = ["2024-01-01 09:30:00", "2024-01-01 09:31:00", "2024-01-01 09:31:00"]
+    return csv_path, timestamps, ["MSFT", "AAPL", "MSFT"], [410.5, 190.25, 410.75]
+
+
+def test_sidecar_round_trip(tmp_path):
+    csv_path, timestamps, symbols, prices = _market_csv(tmp_path)
+    gateway._write_sidecar(csv_path, timestamps, symbols, prices)
+    assert gateway._read_sidecar(csv_path) == (timestamps, symbols, prices)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_sidecar_corrupt_or_stale_is_a_miss(tmp_path):
+    csv_path, timestamps, symbols, prices = _market_csv(tmp_path)
+    sidecar = gateway._sidecar_path(csv_path)
+
+    sidecar.write_bytes(b"PK\x03\x04 truncated")
+    assert gateway._read_sidecar(csv_path) is None
+    sidecar.write_bytes(b"")
+    assert gateway._read_sidecar(csv_path) is None
+
+    gateway._write_sidecar(csv_path, timestamps, symbols, prices)
+    csv_mtime = sidecar.stat().st_mtime_ns + 1_000_000_000
+    os.utime(csv_path, ns=(csv_mtime, csv_mtime))
+    assert gateway._read_sidecar(csv_path) is None
+
+
+def test_backtester_data_cache_follows_the_file_it_reads(tmp_path):
+    csv_path = tmp_path / "elsewhere.csv"
+    csv_path.write_text("Datetime,Symbol,Close\n2024-01-01 09:30:00,ABC,10.0\n2024-01-01 09:31:00,ABC,11.0\n")
+    first = backtester._load_by_symbol(backtester.load_market_data, str(csv_path))
+    assert first["ABC"].prices.tolist() == [10.0, 11.0]
+
+    csv_path.write_text("Datetime,Symbol,Close\n2024-01-01 09:30:00,ABC,12.0\n")
+    later = os.stat(csv_path).st_mtime_ns + 1_000_000_000
+    os.utime(csv_path, ns=(later, later))
+    assert backtester._load_by_symbol(backtester.load_market_data, str(csv_path))["ABC"].prices.tolist() == [12.0]
+
+
+def test_process_orders_batch_keeps_order_and_risk_state():
+    np.random.seed(0)
+    risk = RiskEngineSim(max_order_size=50, max_position=60, cash_balance=1_000_000)
+    om = OrderManager(None, risk, simulated=True)
+    orders = [Order(side="BUY" if i % 3 else "SELL", symbol="BTC/USD", qty=5 + i % 7, price=100.0) for i in range(40)]
+    orders[4] = Order(side="BUY", symbol="BTC/USD", qty=0, price=100.0)
+    orders[9] = Order(side="BUY", symbol="BTC/USD", qty=500, price=100.0)
+
+    results = om.process_orders_batch(orders, max_workers=4)
+
+    assert len(results) == len(orders)
+    assert results[4] == {"ok": False, "msg": "Quantity must be > 0"}
+    assert results[9] == {"ok": False, "msg": "risk_check_failed"}
+    executed = [r for r in results if r.get("status") in ("FILLED", "PARTIAL")]
+    net = sum(r["filled_qty"] * (1 if r["order"]["side"] == "BUY" else -1) for r in executed)
+    assert risk.net_position("BTC/USD") == net
+    assert abs(net) <= risk.max_position
+    assert len(om.orders) == len(executed)
+    # Accepted orders are stamped in submission order
+    ids = [r["order"]["id"] for r in results if r.get("ok")]
+    assert ids == sorted(ids)
+    om.close()
+
+
+def test_risk_engine_reset_leaves_old_history_untouched():
+    risk = RiskEngineSim()
+    risk.update_position(Order(side="BUY", symbol="ABC", qty=5, price=10.0))
+    history = risk._shard("ABC").orders
+    risk.reset()
+    risk.update_position(Order(side="SELL", symbol="XYZ", qty=7, price=20.0))
+    assert [(o.side, o.symbol, o.qty, o.price) for o in history] == [("BUY", "ABC", 5, 10.0)]
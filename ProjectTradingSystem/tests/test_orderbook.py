@@ -0,0 +1,187 @@
+import heapq
+import random
+import sys
+from pathlib import Path
+
+# Ensure ProjectTradingSystem modules are importable
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from orderbook import OrderBook
+
+
+class HeapOrderBook:
+    """
+    The original heap-backed OrderBook (dict records, lazily skipped stale heap
+    entries), kept as the reference the price-level book must agree with.
+    """
+
+    def __init__(self):
+        self.bids = []
+        self.asks = []
+        self.orders = {}
+        self._seq = 0
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def _push(self, rec):
+        entry = (-rec["price"] if rec["side"] == "BUY" else rec["price"], rec["seq"], rec["order_id"], rec["version"])
+        heapq.heappush(self.bids if rec["side"] == "BUY" else self.asks, entry)
+
+    def _best(self, side):
+        heap = self.bids if side == "BUY" else self.asks
+        while heap:
+            _, _, oid, ver = heap[0]
+            rec = self.orders.get(oid)
+            if not rec or not rec["active"] or rec["qty"] <= 0 or rec["version"] != ver or rec["side"] != side:
+                heapq.heappop(heap)
+                continue
+            return rec["price"], rec
+        return None, None
+
+    def _match(self, incoming):
+        trades = []
+        counter_side = "SELL" if incoming["side"] == "BUY" else "BUY"
+        while incoming["qty"] > 0:
+            best_price, resting = self._best(counter_side)
+            if resting is None:
+                break
+            if incoming["side"] == "BUY" and incoming["price"] < best_price:
+                break
+            if incoming["side"] == "SELL" and incoming["price"] > best_price:
+                break
+            qty = min(incoming["qty"], resting["qty"])
+            incoming["qty"] -= qty
+            resting["qty"] -= qty
+            buy, sell = (incoming, resting) if incoming["side"] == "BUY" else (resting, incoming)
+            trades.append({"buy_id": buy["order_id"], "sell_id": sell["order_id"], "price": resting["price"], "qty": qty})
+            if resting["qty"] <= 0:
+                resting["active"] = False
+        if incoming["qty"] <= 0:
+            incoming["active"] = False
+        return trades
+
+    def add_order(self, order):
+        base = self.orders.get(order["order_id"], {})
+        rec = {
+            "order_id": order["order_id"],
+            "side": order["side"],
+            "price": float(order["price"]),
+            "qty": int(order["qty"]),
+            "active": True,
+            "seq": self._next_seq(),
+            "version": base.get("version", 0) + 1,
+        }
+        self.orders[rec["order_id"]] = rec
+        self._push(rec)
+        return self._match(rec)
+
+    def modify_order(self, order_id, new_qty=None, new_price=None):
+        rec = self.orders.get(order_id)
+        if not rec or not rec["active"]:
+            return []
+        if new_qty is not None:
+            rec["qty"] = int(new_qty)
+        if new_price is not None:
+            rec["price"] = float(new_price)
+        rec["seq"] = self._next_seq()
+        rec["version"] += 1
+        self._push(rec)
+        return self._match(rec)
+
+    def cancel_order(self, order_id):
+        rec = self.orders.get(order_id)
+        if not rec or not rec["active"]:
+            return False
+        rec["active"] = False
+        rec["qty"] = 0
+        rec["version"] += 1
+        return True
+
+    def best_bid(self):
+        return self._best("BUY")[0]
+
+    def best_ask(self):
+        return self._best("SELL")[0]
+
+    def depth(self):
+        bids, asks = {}, {}
+        for rec in self.orders.values():
+            if rec["active"] and rec["qty"] > 0:
+                book = bids if rec["side"] == "BUY" else asks
+                book[rec["price"]] = book.get(rec["price"], 0) + rec["qty"]
+        return {"bids": sorted(bids.items(), key=lambda x: -x[0]), "asks": sorted(asks.items())}
+
+
+def _fills(trades):
+    return [(t["buy_id"], t["sell_id"], t["price"], t["qty"]) for t in trades]
+
+
+def _assert_same_book(book, ref):
+    assert book.best_bid() == ref.best_bid()
+    assert book.best_ask() == ref.best_ask()
+    assert book.depth() == ref.depth()
+    for oid, rec in ref.orders.items():
+        assert (book.orders[oid]["active"], book.orders[oid]["qty"]) == (rec["active"], rec["qty"])
+
+
+def _random_ops(rng, n_ops, n_ids):
+    for _ in range(n_ops):
+        oid = rng.randrange(1, n_ids)
+        u = rng.random()
+        price = round(100 + rng.randint(-8, 8) * 0.25, 2)
+        if u < 0.6:
+            yield "add", {"order_id": oid, "side": rng.choice(("BUY", "SELL")), "symbol": "ABC", "price": price, "qty": rng.randint(1, 50)}
+        elif u < 0.85:
+            new_qty = rng.randint(1, 50) if rng.random() < 0.5 else None
+            new_price = price if new_qty is None or rng.random() < 0.5 else None
+            yield "modify", (oid, new_qty, new_price)
+        else:
+            yield "cancel", oid
+
+
+def test_orderbook_matches_heap_reference_on_random_flow():
+    for seed in range(20):
+        rng = random.Random(seed)
+        book, ref = OrderBook(), HeapOrderBook()
+        for op, arg in _random_ops(rng, 400, 60):
+            if op == "add":
+                assert _fills(book.add_order(dict(arg))) == _fills(ref.add_order(dict(arg)))
+            elif op == "modify":
+                assert _fills(book.modify_order(*arg)) == _fills(ref.modify_order(*arg))
+            else:
+                assert book.cancel_order(arg) == ref.cancel_order(arg)
+            _assert_same_book(book, ref)
+
+
+def test_orderbook_reset_behaves_like_a_fresh_book():
+    book = OrderBook()
+    for op, arg in _random_ops(random.Random(99), 300, 40):
+        if op == "add":
+            book.release_trades(book.add_order(dict(arg)))
+    book.reset()
+    assert book.best_bid() is None and book.best_ask() is None
+    assert book.depth() == {"bids": [], "asks": []}
+
+    ref = HeapOrderBook()
+    for op, arg in _random_ops(random.Random(7), 300, 40):
+        if op == "add":
+            assert _fills(book.add_order(dict(arg))) == _fills(ref.add_order(dict(arg)))
+        elif op == "modify":
+            assert _fills(book.modify_order(*arg)) == _fills(ref.modify_order(*arg))
+        else:
+            assert book.cancel_order(arg) == ref.cancel_order(arg)
+    _assert_same_book(book, ref)
+
+
+def test_orderbook_depth_levels_returns_best_levels_first():
+    book = OrderBook()
+    for i, price in enumerate((99.0, 98.0, 97.0)):
+        book.add_order({"order_id": i, "side": "BUY", "symbol": "ABC", "price": price, "qty": 1 + i})
+    for i, price in enumerate((101.0, 102.0, 103.0)):
+        book.add_order({"order_id": 10 + i, "side": "SELL", "symbol": "ABC", "price": price, "qty": 1 + i})
+    assert book.depth(levels=2) == {"bids": [(99.0, 1), (98.0, 2)], "asks": [(101.0, 1), (102.0, 2)]}
+    assert book.depth(levels=0) == {"bids": [], "asks": []}
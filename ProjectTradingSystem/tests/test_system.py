@@ -2,8 +2,6 @@ import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import pytest
-
 # Ensure ProjectTradingSystem modules are importable
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -14,18 +12,10 @@ from order import Order
 from order_manager import OrderManager
 from orderbook import OrderBook
 from matching_engine import MatchingEngine
-from risk_engine import RiskEngine
+from risk_engine import RiskEngineSim
 from strategy import MarketDataPoint, MAStrategy, MomentumStrategy, StatisticalSignalStrategy
 
 
-@pytest.fixture(autouse=True)
-def reset_risk_engine():
-    # RiskEngine is a singleton; reset between tests.
-    RiskEngine._instance = None
-    yield
-    RiskEngine._instance = None
-
-
 def test_gateway_loads_market_data(tmp_path):
     csv_file = tmp_path / "market_data.csv"
     csv_file.write_text(
@@ -33,14 +23,14 @@ def test_gateway_loads_market_data(tmp_path):
         "2025-01-01 09:30:00,100,101,99,100.5,1000,ABC\n"
         "2025-01-01 09:31:00,100.5,102,100,101,1200,ABC\n"
     )
-    points = list(load_market_data(str(csv_file)))
+    points = list(load_market_data(simulated=True, csv_path=str(csv_file)))
     assert len(points) == 2
     assert points[0].symbol == "ABC"
     assert points[0].price == 100.5
 
 
 def test_mastrategy_buy_and_sell_signals():
-    strat = MAStrategy(symbol="ABC", short_window=2, long_window=3, position_size=1)
+    strat = MAStrategy(symbol="ABC", short_window=2, long_window=3)
     base = datetime(2025, 1, 1, 9, 30, 0)
     prices = [100, 99, 101, 102, 99]  # should buy at 102 crossover, sell on drop to 99
     signals = []
@@ -54,7 +44,7 @@ def test_mastrategy_buy_and_sell_signals():
 
 
 def test_momentum_strategy_buy_and_sell():
-    strat = MomentumStrategy(symbol="ABC", momentum_window=1, momentum_threshold=0.0, position_size=1)
+    strat = MomentumStrategy(symbol="ABC", momentum_window=1, momentum_threshold=0.0)
     base = datetime(2025, 1, 1, 9, 30, 0)
     # Prices dip, then rise (BUY), then drop (SELL)
     prices = [100, 99, 100.5, 99]
@@ -69,7 +59,7 @@ def test_momentum_strategy_buy_and_sell():
 
 
 def test_statistical_strategy_buy_and_sell():
-    strat = StatisticalSignalStrategy(symbol="ABC", lookback_window=3, zscore_threshold=0.5, position_size=1)
+    strat = StatisticalSignalStrategy(symbol="ABC", lookback_window=3, zscore_threshold=0.5)
     base = datetime(2025, 1, 1, 9, 30, 0)
     prices = [100, 101, 102, 90, 100]  # oversold then mean reversion above 0
     signals = []
@@ -114,7 +104,7 @@ def test_matching_engine_simulation_returns_expected_keys():
 
 
 def test_risk_engine_limits_and_cash_updates():
-    re = RiskEngine(max_order_size=10, max_position=10, cash_balance=100, max_total_buy=8, max_total_sell=8)
+    re = RiskEngineSim(max_order_size=10, max_position=10, cash_balance=100, max_total_buy=8, max_total_sell=8)
     buy_order = Order(side="BUY", symbol="ABC", qty=5, price=10)
     assert re.check(buy_order)
     re.update_position(buy_order, filled_qty=5)
@@ -134,10 +124,16 @@ def test_order_manager_flow_with_logging(tmp_path, monkeypatch):
     audit_file = tmp_path / "audit.csv"
     monkeypatch.setattr("gateway._default_audit_path", lambda: audit_file)
 
-    om = OrderManager(RiskEngine(max_order_size=1000, max_position=1000, cash_balance=1_000_000), simulated=True)
+    # Equity orders are only accepted during trading hours
+    monkeypatch.setattr("order_manager.is_market_open_now", lambda: True)
+
+    risk = RiskEngineSim(max_order_size=1000, max_position=1000, cash_balance=1_000_000)
+    om = OrderManager(None, risk, simulated=True)
     order = Order(side="BUY", symbol="ABC", qty=5, price=100)
     result = om.process_order(order)
     assert result["ok"] is True
+    # Audit rows are written by the log sink's thread
+    assert om.flush_logs(timeout=5.0)
     assert audit_file.exists()
     # Expect qty/price populated and status in allowed set
     assert result["status"] in {"FILLED", "PARTIAL", "CANCELLED"}